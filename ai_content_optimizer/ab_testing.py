@@ -2,10 +2,10 @@
 Milestone 3 – Module 3
 A/B Testing Engine (FINAL – STABLE)
 ----------------------------------
-- Reads Generated_Content from Content_Creation sheet
+- Reads Generated_Content from Content_Creation (via storage layer)
 - Creates Variant B using rule-based optimization
 - Scores Variant A vs Variant B
-- Writes results to AB_Testing sheet
+- Writes results to AB_Testing sheet (buffered append_rows)
 - Sends Slack notification
 """
 
@@ -15,11 +15,12 @@ A/B Testing Engine (FINAL – STABLE)
 import os
 import re
 import time
-import gspread
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
-from oauth2client.service_account import ServiceAccountCredentials
+
+from notifications import notify
+from storage import get_storage, sheets_enabled
+from text_features import text_features
 
 # ===============================
 # LOAD ENV
@@ -28,38 +29,15 @@ load_dotenv()
 
 SERVICE_ACCOUNT_FILE = os.getenv("GSPREAD_SERVICE_ACCOUNT_FILE")
 SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
-SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 
 SOURCE_SHEET = "Content_Creation"
 AB_SHEET = "AB_Testing"
 
-if not SERVICE_ACCOUNT_FILE or not SPREADSHEET_ID:
-    raise EnvironmentError("❌ Google Sheets config missing in .env")
+# Rows per append_rows request
+AB_APPEND_CHUNK = int(os.getenv("AB_APPEND_CHUNK", "500"))
 
-# ===============================
-# CONNECT TO GOOGLE SHEETS
-# ===============================
-def connect_spreadsheet():
-    scope = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(
-        SERVICE_ACCOUNT_FILE, scope
-    )
-    client = gspread.authorize(creds)
-    return client.open_by_key(SPREADSHEET_ID)
-
-# ===============================
-# SLACK
-# ===============================
-def send_slack(message):
-    if not SLACK_WEBHOOK_URL:
-        return
-    try:
-        requests.post(SLACK_WEBHOOK_URL, json={"text": message}, timeout=5)
-    except Exception:
-        pass
+if sheets_enabled() and (not SERVICE_ACCOUNT_FILE or not SPREADSHEET_ID):
+    raise EnvironmentError("❌ Google Sheets config missing in .env")
 
 # ===============================
 # CREATE VARIANT B
@@ -90,18 +68,17 @@ def create_variant_b(text, platform):
 def score_content(text):
     score = 0
 
-    words = len(text.split())
-    if 10 <= words <= 60:
+    features = text_features(text)
+    if 10 <= features.word_count <= 60:
         score += 3
 
-    if any(w in text.lower() for w in ["reply", "comment", "subscribe", "discuss"]):
+    if features.hit("engagement"):
         score += 3
 
-    hashtags = re.findall(r"#\w+", text)
-    if 1 <= len(hashtags) <= 3:
+    if 1 <= len(features.hashtags) <= 3:
         score += 2
 
-    if any(w in text.lower() for w in ["ai", "growth", "smart", "boost"]):
+    if features.hit("trending"):
         score += 2
 
     return min(score, 10)
@@ -112,20 +89,13 @@ def score_content(text):
 def run_ab_testing():
     print("\n⚖️ Starting A/B Testing Engine...\n")
 
-    sheet = connect_spreadsheet()
-    source_ws = sheet.worksheet(SOURCE_SHEET)
-    rows = source_ws.get_all_records()
+    store = get_storage()
+    rows = store.read_records(SOURCE_SHEET)
 
     if not rows:
         print("⚠️ No content found in Content_Creation")
         return
 
-    # ---------- Output Sheet ----------
-    try:
-        ab_ws = sheet.worksheet(AB_SHEET)
-    except gspread.exceptions.WorksheetNotFound:
-        ab_ws = sheet.add_worksheet(title=AB_SHEET, rows="1000", cols="15")
-
     # ---------- Headers ----------
     headers = [
         "Test_ID",
@@ -139,21 +109,21 @@ def run_ab_testing():
         "Winner",
     ]
 
-    if ab_ws.row_values(1) != headers:
-        ab_ws.clear()
-        ab_ws.append_row(headers)
+    if store.read_headers(AB_SHEET) != headers:
+        store.replace_table(AB_SHEET, headers, [])
 
     processed = 0
+    results = []
 
     for idx, row in enumerate(rows, start=1):
         print(f"🔄 Processing row {idx}...")
 
-        original = row.get("Generated_Content", "").strip()
+        original = str(row.get("Generated_Content", "")).strip()
         if not original:
             continue
 
         topic = row.get("Topic", "")
-        platform = row.get("Platform", "").lower()
+        platform = str(row.get("Platform", "")).lower()
 
         variant_b = create_variant_b(original, platform)
         score_a = score_content(original)
@@ -161,7 +131,7 @@ def run_ab_testing():
 
         winner = "Variant A" if score_a >= score_b else "Variant B"
 
-        ab_ws.append_row([
+        results.append([
             f"AB-{int(time.time())}-{idx}",
             datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             topic,
@@ -176,7 +146,10 @@ def run_ab_testing():
         print(f"✅ Winner: {winner} (A={score_a}, B={score_b})")
         processed += 1
 
-    send_slack(f"⚖️ A/B Testing completed for {processed} items")
+    calls = store.append_rows(AB_SHEET, results, chunk_size=AB_APPEND_CHUNK)
+    print(f"📤 AB_Testing rows written with {calls} API call(s)")
+
+    notify(f"⚖️ A/B Testing completed for {processed} items")
     print(f"\n🎉 A/B Testing finished: {processed} rows processed")
 
 # ===============================
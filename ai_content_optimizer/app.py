@@ -1,8 +1,5 @@
-import os
 import streamlit as st
 import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from dotenv import load_dotenv
 
 # ===============================
@@ -13,7 +10,7 @@ load_dotenv()
 # ===============================
 # BACKEND IMPORTS
 # ===============================
-from content_generation import generate_content
+from content_generation import generate_content, cache_stats
 from content_optimization import optimize_content, calculate_score
 from sentiment_analysis import analyze_sentiment
 from ab_testing import run_ab_testing
@@ -24,26 +21,16 @@ from collect_youtube import fetch_youtube_videos
 from collect_reddit import fetch_posts
 from collect_twitter import fetch_tweets
 
+from storage import get_storage
+
 # ===============================
-# GOOGLE SHEETS HELPERS
+# STORAGE HELPERS
 # ===============================
-def connect_sheet():
-    cred_path = os.getenv("GSPREAD_SERVICE_ACCOUNT_FILE")
-    sheet_id = os.getenv("SPREADSHEET_ID")
-
-    scope = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(cred_path, scope)
-    client = gspread.authorize(creds)
-    return client.open_by_key(sheet_id)
-
+# Storage (and its Sheets client / worksheet handles) is cached
+# process-wide, so Streamlit reruns skip the OAuth + TLS handshake
 def load_sheet_df(sheet_name):
     try:
-        sheet = connect_sheet()
-        ws = sheet.worksheet(sheet_name)
-        return pd.DataFrame(ws.get_all_records())
+        return pd.DataFrame(get_storage().read_records(sheet_name))
     except:
         return pd.DataFrame()
 
@@ -79,6 +66,11 @@ module = st.sidebar.radio(
     ]
 )
 
+# Tab reads are cached in memory (STORAGE_CACHE_TTL) and dropped
+# automatically after our own writes; this forces a fresh download
+if st.sidebar.button("🔄 Refresh data"):
+    get_storage().invalidate()
+
 # ===============================
 # HEADER
 # ===============================
@@ -123,6 +115,7 @@ elif module == "Content Generation":
         "Platform",
         ["twitter", "youtube", "reddit"]
     )
+    fresh = st.checkbox("Fresh copy (skip response cache)")
 
     if st.button("Generate Content"):
         prompt = f"""
@@ -132,11 +125,18 @@ Content Types: {content_types}
 Tone: {tones}
 Keywords: {keywords}
 """
-        content = generate_content(prompt, platform)
+        content = generate_content(prompt, platform, fresh=fresh)
         st.session_state.generated_content = content
         st.session_state.platform = platform
         st.text_area("Generated Content", content, height=300)
 
+        stats = cache_stats()
+        if stats:
+            st.caption(
+                f"Cache: {stats['hits']} hits / {stats['misses']} misses · "
+                f"~{stats['saved_seconds']}s saved"
+            )
+
 # ======================================================
 # CONTENT OPTIMIZATION
 # ======================================================
@@ -197,10 +197,9 @@ elif module == "A/B Testing":
 elif module == "Performance Metrics":
     if st.button("Update Metrics"):
         try:
-            sheet = connect_sheet()
             df = load_sheet_df("Content_Creation")
             metrics = calculate_metrics(df)
-            upload_metrics(sheet, metrics)
+            upload_metrics(metrics)
         except:
             pass
 
@@ -6,8 +6,11 @@
 #
 # Notes: Ensure the Instagram account is Business/Creator and connected to a Facebook Page.
 from dotenv import load_dotenv
-import os, requests, sys, time
-import pandas as pd
+import os, requests, sys, json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from transport import get_session
+from sinks import CsvSink, drain
 
 load_dotenv()
 
@@ -17,62 +20,155 @@ if not ACCESS_TOKEN or not IG_USER_ID:
     print('Missing IG_ACCESS_TOKEN or IG_USER_ID in environment. See .env.template.')
     sys.exit(1)
 
-GRAPH = 'https://graph.facebook.com/v17.0'  # adjust version as needed
+GRAPH = os.getenv('IG_GRAPH_URL', 'https://graph.facebook.com/v17.0')  # adjust version as needed
 
-def fetch_media_list(ig_user_id, limit=50):
+INSIGHT_METRICS = 'engagement,impressions,reach,saved'
+BATCH_SIZE = 50  # Graph API limit per batch request
+INSIGHTS_WORKERS = int(os.getenv('IG_INSIGHTS_WORKERS', '4'))
+
+# Shared pooled keep-alive session for every Graph API call
+session = get_session('instagram', pool_size=INSIGHTS_WORKERS)
+
+def first_media_page(ig_user_id, limit=50):
     url = f'{GRAPH}/{ig_user_id}/media'
     params = {'access_token': ACCESS_TOKEN, 'fields': 'id,caption,media_type,media_url,timestamp' , 'limit': limit}
-    all_media = []
-    while url:
-        resp = requests.get(url, params=params)
-        if resp.status_code == 400:
-            print('Bad request. Check permissions and access token.')
-            resp.raise_for_status()
+    return url, params
+
+def fetch_media_page(url, params):
+    """Returns (media items, next page url or None)"""
+    resp = session.get(url, params=params, timeout=30)
+    if resp.status_code == 400:
+        print('Bad request. Check permissions and access token.')
         resp.raise_for_status()
-        data = resp.json()
-        items = data.get('data', [])
-        all_media.extend(items)
-        paging = data.get('paging', {})
-        next_page = paging.get('next')
-        url = next_page
+    resp.raise_for_status()
+    data = resp.json()
+    paging = data.get('paging', {})
+    return data.get('data', []), paging.get('next')
+
+def iter_media(ig_user_id, limit=50):
+    """Yields media items page by page while following paging.next"""
+    url, params = first_media_page(ig_user_id, limit)
+    while url:
+        items, url = fetch_media_page(url, params)
+        yield from items
         params = {}  # when using next, params are in the next url
-    return all_media
+
+def fetch_media_list(ig_user_id, limit=50):
+    return list(iter_media(ig_user_id, limit))
+
+def _parse_insights(data):
+    return {d['name']: d.get('values', [{}])[0].get('value') for d in data}
 
 def fetch_insights(media_id):
     url = f'{GRAPH}/{media_id}/insights'
-    params = {'metric': 'engagement,impressions,reach,saved', 'access_token': ACCESS_TOKEN}
-    resp = requests.get(url, params=params)
+    params = {'metric': INSIGHT_METRICS, 'access_token': ACCESS_TOKEN}
+    try:
+        resp = session.get(url, params=params, timeout=30)
+    except requests.RequestException:
+        return {}
     if resp.status_code != 200:
         return {}
-    data = resp.json().get('data', [])
-    return {d['name']: d.get('values', [{}])[0].get('value') for d in data}
+    return _parse_insights(resp.json().get('data', []))
+
+def fetch_insights_batch(media_ids):
+    """
+    Insights for up to BATCH_SIZE media in one Graph API batch request.
+    A failed item gets {} (its row is kept with empty metrics); if the
+    whole batch fails, falls back to one request per media item.
+    """
+    batch = [
+        {'method': 'GET', 'relative_url': f'{media_id}/insights?metric={INSIGHT_METRICS}'}
+        for media_id in media_ids
+    ]
+    try:
+        resp = session.post(
+            f'{GRAPH}/',
+            data={'access_token': ACCESS_TOKEN, 'batch': json.dumps(batch)},
+            timeout=60
+        )
+        resp.raise_for_status()
+        results = resp.json()
+    except (requests.RequestException, ValueError) as e:
+        print(f'Batch insights request failed ({e}); retrying items one by one')
+        return {media_id: fetch_insights(media_id) for media_id in media_ids}
+
+    insights = {}
+    for media_id, item in zip(media_ids, results):
+        if not item or item.get('code') != 200:
+            insights[media_id] = {}
+            continue
+        try:
+            insights[media_id] = _parse_insights(json.loads(item['body']).get('data', []))
+        except (ValueError, KeyError, TypeError):
+            insights[media_id] = {}
+    return insights
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+FIELDS = ['platform', 'post_id', 'caption', 'media_type', 'media_url', 'timestamp',
+          'engagement', 'impressions', 'reach', 'saved']
+
+# Insights batches in flight at once; bounds memory for long media histories
+MAX_PENDING_BATCHES = INSIGHTS_WORKERS * 2
+
+def iter_normalized(media_list):
+    """
+    media_list can be any iterable (e.g. iter_media): each chunk of
+    BATCH_SIZE items is handed to the insights pool as soon as it arrives,
+    so insights are fetched while later media pages are still loading.
+    Rows are yielded as their batch completes; at most
+    MAX_PENDING_BATCHES chunks are held in memory.
+    """
+    total = failed = 0
+
+    def rows_of(chunk, job):
+        nonlocal total, failed
+        insights_by_id = job.result()
+        for m in chunk:
+            insights = insights_by_id.get(m['id'], {})
+            total += 1
+            if not insights:
+                failed += 1
+            yield {
+                'platform': 'instagram',
+                'post_id': m.get('id'),
+                'caption': m.get('caption'),
+                'media_type': m.get('media_type'),
+                'media_url': m.get('media_url'),
+                'timestamp': m.get('timestamp'),
+                'engagement': insights.get('engagement'),
+                'impressions': insights.get('impressions'),
+                'reach': insights.get('reach'),
+                'saved': insights.get('saved')
+            }
+
+    with ThreadPoolExecutor(max_workers=INSIGHTS_WORKERS) as pool:
+        pending = deque()
+        for chunk in _chunks(media_list, BATCH_SIZE):
+            pending.append((chunk, pool.submit(fetch_insights_batch, [m['id'] for m in chunk])))
+            if len(pending) >= MAX_PENDING_BATCHES:
+                yield from rows_of(*pending.popleft())
+        while pending:
+            yield from rows_of(*pending.popleft())
+
+    if failed:
+        print(f'Insights unavailable for {failed} of {total} media items')
 
 def normalize(media_list):
-    rows = []
-    for m in media_list:
-        insights = fetch_insights(m['id'])
-        rows.append({
-            'platform': 'instagram',
-            'post_id': m.get('id'),
-            'caption': m.get('caption'),
-            'media_type': m.get('media_type'),
-            'media_url': m.get('media_url'),
-            'timestamp': m.get('timestamp'),
-            'engagement': insights.get('engagement'),
-            'impressions': insights.get('impressions'),
-            'reach': insights.get('reach'),
-            'saved': insights.get('saved')
-        })
-    return rows
+    return list(iter_normalized(media_list))
 
 def main():
-    media = fetch_media_list(IG_USER_ID)
-    rows = normalize(media)
-    import pandas as pd
-    df = pd.DataFrame(rows)
     out = 'sample_data_instagram.csv'
-    df.to_csv(out, index=False)
-    print(f'Wrote {len(df)} rows to {out}')
+    count = drain(iter_normalized(iter_media(IG_USER_ID)), CsvSink(out, FIELDS, append=False))
+    print(f'Wrote {count} rows to {out}')
 
 if __name__ == '__main__':
     main()
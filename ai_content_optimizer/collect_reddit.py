@@ -1,18 +1,47 @@
 # --- Import necessary libraries ---
 from dotenv import load_dotenv
-import os, praw, time
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+import os, json, threading, praw
+from concurrent.futures import ThreadPoolExecutor
+from transport import sheets_service
+from itertools import chain
+from sheets_quota import execute
+from sinks import append_values
+from rate_limit import TokenBucket
 
 # --- Load environment variables ---
 load_dotenv()
 
-# --- Connect to Reddit API using PRAW ---
-reddit = praw.Reddit(
-    client_id=os.getenv("REDDIT_CLIENT_ID"),
-    client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
-    user_agent="AIContentOptimizer/1.0"
-)
+# --- Reddit API limits: ~100 requests / minute per OAuth client ---
+REDDIT_REQUESTS_PER_MIN = float(os.getenv("REDDIT_REQUESTS_PER_MIN", "90"))
+REDDIT_WORKERS = int(os.getenv("REDDIT_WORKERS", "4"))
+POSTS_PER_SUB = 20
+LISTING_PAGE_SIZE = 100  # PRAW fetches listings 100 items per request
+
+# --- Last-seen post per subreddit (for incremental runs) ---
+STATE_FILE = os.getenv("REDDIT_STATE_FILE", "reddit_state.json")
+
+# One limiter shared by every worker thread
+rate_limiter = TokenBucket(REDDIT_REQUESTS_PER_MIN, burst=REDDIT_WORKERS)
+
+# --- Connect to Reddit API using PRAW (one instance per thread: PRAW is not thread-safe) ---
+_local = threading.local()
+
+# REDDIT_OAUTH_URL / REDDIT_URL point PRAW at another host (e.g. a local stub)
+URL_OVERRIDES = {
+    key: os.getenv(env)
+    for key, env in (("oauth_url", "REDDIT_OAUTH_URL"), ("reddit_url", "REDDIT_URL"))
+    if os.getenv(env)
+}
+
+def get_reddit():
+    if not hasattr(_local, "reddit"):
+        _local.reddit = praw.Reddit(
+            client_id=os.getenv("REDDIT_CLIENT_ID"),
+            client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
+            user_agent="AIContentOptimizer/1.0",
+            **URL_OVERRIDES
+        )
+    return _local.reddit
 
 # --- Choose subreddits to collect posts from ---
 SUBREDDITS = [
@@ -20,52 +49,134 @@ SUBREDDITS = [
     "socialmedia", "Entrepreneur", "growthhacking"
 ]
 
-# --- Function to fetch Reddit posts ---
-def fetch_posts(max_posts=120):
-    posts = []
-    for sub in SUBREDDITS:
-        for post in reddit.subreddit(sub).hot(limit=20):
-            posts.append([sub, post.title, str(post.author), post.score, post.url])
-            if len(posts) >= max_posts:  # stop when enough posts collected
-                return posts
-            time.sleep(0.2)
-    return posts
-
-# --- Function to upload data to Google Sheets ---
-def upload_to_sheet(values):
-    creds = service_account.Credentials.from_service_account_file(
-        "credentials.json",
-        scopes=["https://www.googleapis.com/auth/spreadsheets"]
-    )
+# --- Incremental state helpers ---
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state):
+    with open(STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+# --- Fetch one subreddit ---
+# Incremental runs read "new" (newest first) and stop at the last-seen post;
+# one-off fetches keep reading "hot"
+def fetch_submissions(sub, limit=POSTS_PER_SUB, incremental=False, since=None):
+    """
+    Returns (PRAW submissions newest first, newest created_utc).
+    With `since`, "new" is paged without a limit down to the last-seen
+    post, so a burst of more than `limit` posts is not skipped.
+    """
+    subreddit = get_reddit().subreddit(sub)
+    if incremental:
+        listing = subreddit.new(limit=None if since else limit)
+    else:
+        listing = subreddit.hot(limit=limit)
+
+    submissions, newest = [], None
+    for i, post in enumerate(listing):
+        if i % LISTING_PAGE_SIZE == 0:
+            rate_limiter.acquire()
+        if since and post.created_utc <= since:
+            break
+        if newest is None:
+            newest = post.created_utc
+        submissions.append(post)
+    return submissions, newest
+
+def to_row(sub, post):
+    return [sub, post.title, str(post.author), post.score, post.url]
+
+def fetch_subreddit(sub, limit=POSTS_PER_SUB, incremental=False, since=None):
+    submissions, newest = fetch_submissions(sub, limit, incremental, since)
+    return [to_row(sub, post) for post in submissions], newest
+
+# --- Share `room` posts fairly: small subreddits keep all their posts, ---
+# --- the rest split what is left evenly ---
+def split_room(sizes, room):
+    shares = [0] * len(sizes)
+    left = len(sizes)
+    for i in sorted(range(len(sizes)), key=lambda i: sizes[i]):
+        shares[i] = min(sizes[i], room // left)
+        room -= shares[i]
+        left -= 1
+    return shares
 
-    # Connect to Google Sheets API
-    service = build("sheets", "v4", credentials=creds)
+# --- Fetch Reddit posts from all subreddits concurrently ---
+# Yields rows one subreddit at a time. Incremental runs record the new
+# watermarks in `state`; call save_state(state) only once the rows are stored.
+def iter_posts(max_posts=120, incremental=False, state=None):
+    if state is None:
+        state = load_state() if incremental else {}
+    since = dict(state)
+
+    pool = ThreadPoolExecutor(max_workers=REDDIT_WORKERS)
+    try:
+        results = pool.map(
+            lambda sub: fetch_submissions(sub, incremental=incremental, since=since.get(sub)),
+            SUBREDDITS
+        )
+
+        if not incremental:
+            # "hot": top posts in subreddit order, stop when enough posts collected
+            count = 0
+            for sub, (submissions, _) in zip(SUBREDDITS, results):
+                submissions = submissions[:max_posts - count]
+                count += len(submissions)
+                yield from (to_row(sub, post) for post in submissions)
+                if count >= max_posts:
+                    return
+            return
+
+        # "new": every subreddit gets its share of the cap, so a busy one
+        # cannot starve the others run after run
+        results = list(results)
+        shares = split_room([len(submissions) for submissions, _ in results], max_posts)
+        for sub, (submissions, newest), share in zip(SUBREDDITS, results, shares):
+            if len(submissions) > share:
+                # Keep the oldest new posts: the watermark then stops at the
+                # newest one kept and the rest follow next run
+                submissions = submissions[len(submissions) - share:]
+                newest = submissions[0].created_utc if submissions else None
+            yield from (to_row(sub, post) for post in submissions)
+            if newest is not None:
+                state[sub] = newest
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def fetch_posts(max_posts=120, incremental=False):
+    return list(iter_posts(max_posts, incremental))
+
+# --- Function to append data to Google Sheets ---
+HEADERS = ["Subreddit", "Title", "Author", "Score", "URL"]
+
+def upload_to_sheet(values):
+    # Shared Google Sheets API client (built once)
+    service = sheets_service("credentials.json")
     spreadsheet_id = "1jI2vj3Gwhzgp76ERdB9Sou8JaqpnIpcIBV2oqldh-6M"
     sheet_name = "reddit"  # Only upload to this tab
 
-    # --- Clear old data before writing new ---
-    try:
-        service.spreadsheets().values().clear(
-            spreadsheetId=spreadsheet_id,
-            range=f"{sheet_name}!A1:Z"
-        ).execute()
-        print("🧹 Old data cleared in 'reddit' tab.")
-    except Exception as e:
-        print(f" Could not clear old data: {e}")
-
-    # --- Upload new Reddit data ---
-    body = {"values": [["Subreddit", "Title", "Author", "Score", "URL"]] + values}
-
-    service.spreadsheets().values().update(
+    # --- Write the header row only if the tab is empty ---
+    existing = execute(service.spreadsheets().values().get(
         spreadsheetId=spreadsheet_id,
-        range=f"{sheet_name}!A1",
-        valueInputOption="RAW",
-        body=body
-    ).execute()
+        range=f"{sheet_name}!A1:E1"
+    ), "read")
+    header = [] if existing.get("values") else [HEADERS]
+
+    # --- Append new Reddit posts below the existing ones (values can be a generator) ---
+    count = append_values(service, spreadsheet_id, sheet_name, chain(header, values)) - len(header)
+
+    if not count:
+        print("✅ No new Reddit posts since the last run.")
+        return
 
-    print(f"✅ Uploaded {len(values)} Reddit posts to Google Sheet (tab: {sheet_name})!")
+    print(f"✅ Appended {count} new Reddit posts to Google Sheet (tab: {sheet_name})!")
 
 # --- Run the script ---
 if __name__ == "__main__":
-    data = fetch_posts(120)  # You can change 50 → any number
+    state = load_state()
+    data = iter_posts(120, incremental=True, state=state)  # You can change 120 → any number
     upload_to_sheet(data)
+    save_state(state)  # only after every row reached the sheet
@@ -1,8 +1,12 @@
 # --- Import libraries ---
 from dotenv import load_dotenv
-import os, requests, time
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+import os, json, time
+from concurrent.futures import ThreadPoolExecutor
+from transport import get_session, sheets_service
+from itertools import chain
+from sheets_quota import execute
+from sinks import append_values
+from rate_limit import WindowLimiter
 
 # --- Load API keys from .env file ---
 load_dotenv()
@@ -11,66 +15,195 @@ load_dotenv()
 BEARER_TOKEN = os.getenv("TWITTER_BEARER_TOKEN")
 
 # --- Twitter API endpoint ---
-SEARCH_URL = "https://api.twitter.com/2/tweets/search/recent"
+SEARCH_URL = os.getenv("TWITTER_SEARCH_URL", "https://api.twitter.com/2/tweets/search/recent")
 headers = {"Authorization": f"Bearer {BEARER_TOKEN}"}
 
-# --- Topics to fetch tweets about --- 
+# --- Paging / concurrency ---
+PAGE_SIZE = 100        # search/recent max_results range is 10-100
+MAX_TWEETS_PER_QUERY = int(os.getenv("TWITTER_MAX_TWEETS_PER_QUERY", "500"))
+TWITTER_WORKERS = int(os.getenv("TWITTER_WORKERS", "3"))
+
+# Shared keep-alive session for every search request
+session = get_session("twitter", pool_size=TWITTER_WORKERS, headers=headers)
+
+# --- since_id / resume cursor per query (for incremental runs) ---
+STATE_FILE = os.getenv("TWITTER_STATE_FILE", "twitter_state.json")
+
+# Shared by all queries: paces on x-rate-limit-remaining / x-rate-limit-reset
+rate_limit = WindowLimiter()
+
+# --- Topics to fetch tweets about ---
 QUERIES = [
     "digital marketing",
     "AI marketing",
     "social media strategy",
 ]
 
-# --- Function to fetch tweets ---
-def fetch_tweets(query, max_results=20):
+# --- Incremental state helpers ---
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state):
+    with open(STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+# --- One rate-limit-aware search request ---
+def search(params):
+    while True:
+        rate_limit.acquire()
+        response = session.get(SEARCH_URL, params=params, timeout=30)
+
+        remaining = response.headers.get("x-rate-limit-remaining")
+        reset = response.headers.get("x-rate-limit-reset")
+        if remaining is not None and reset is not None:
+            rate_limit.update(int(remaining), float(reset))
+
+        if response.status_code == 429:
+            wait = max(float(reset or time.time() + 60) - time.time(), 1)
+            print(f"Rate limited, waiting {wait:.0f}s for the window to reset...")
+            time.sleep(wait)
+            continue
+        return response
+
+# --- Function to fetch tweets (pages through next_token) ---
+# Per-query state ("cursor"): {"since_id"} once a run paged all the way back
+# to since_id; {"since_id", "newest_id", "next_token"} when it stopped early
+# (max_tweets cap or an error). The next run then resumes from next_token,
+# and since_id only moves to newest_id once that backlog is drained.
+# A since_id the API rejects is dropped, never carried into the next cursor.
+def _as_cursor(value):
+    if isinstance(value, dict):
+        return dict(value)
+    return {"since_id": value} if value else {}  # plain since_id (older state files)
+
+def fetch_raw(query, max_tweets=MAX_TWEETS_PER_QUERY, cursor=None):
+    """Returns (tweet dicts, next cursor) for about max_tweets tweets newer than the cursor"""
+    cursor = _as_cursor(cursor)
+    since_id = cursor.get("since_id")
+    newest_id = cursor.get("newest_id")
+
     params = {
         "query": query + " -is:retweet lang:en",  # exclude retweets
         "tweet.fields": "id,text,author_id,created_at,public_metrics",
-        "max_results": max_results
     }
+    if since_id:
+        params["since_id"] = since_id
+    resuming = bool(cursor.get("next_token"))
+    if resuming:
+        params["next_token"] = cursor["next_token"]
+
+    tweets, finished = [], False
+    while len(tweets) < max_tweets:
+        # Never fetch past max_tweets: a truncated page would be lost behind next_token
+        params["max_results"] = max(10, min(PAGE_SIZE, max_tweets - len(tweets)))
+        response = search(params)
 
-    response = requests.get(SEARCH_URL, headers=headers, params=params)
+        if response.status_code == 400 and resuming:
+            print(f"Resume token for '{query}' rejected, paging again from since_id")
+            params.pop("next_token")
+            newest_id, resuming = None, False
+            continue
 
-    # Handle errors
-    if response.status_code != 200:
-        print(f"Error {response.status_code}: {response.text}")
-        return []
+        if response.status_code == 400 and "since_id" in params and "next_token" not in params:
+            # e.g. since_id older than the 7-day search window: every tweet the
+            # search still returns is newer, so page the window from the start
+            print(f"since_id for '{query}' rejected, paging again without it")
+            params.pop("since_id")
+            since_id = newest_id = None
+            continue
 
-    tweets = response.json().get("data", [])
-    result = []
+        # Handle errors
+        if response.status_code != 200:
+            print(f"Error {response.status_code}: {response.text}")
+            break
+        resuming = False
 
-    for t in tweets:
-        result.append([
+        payload = response.json()
+        meta = payload.get("meta", {})
+        newest_id = newest_id or meta.get("newest_id")
+
+        tweets.extend(payload.get("data", []))
+
+        if not meta.get("next_token"):
+            finished = True
+            break
+        params["next_token"] = meta["next_token"]
+
+    if finished:
+        next_cursor = {"since_id": newest_id or since_id}
+    else:
+        next_cursor = {
+            "since_id": since_id,
+            "newest_id": newest_id,
+            "next_token": params.get("next_token"),
+        }
+    return tweets, {k: v for k, v in next_cursor.items() if v}
+
+def fetch_query(query, max_tweets=MAX_TWEETS_PER_QUERY, cursor=None):
+    """Returns (rows, next cursor) in the sheet's row format"""
+    tweets, next_cursor = fetch_raw(query, max_tweets, cursor)
+    result = [
+        [
             query,
             t["text"].replace("\n", " "),
             t["author_id"],
             t["public_metrics"]["like_count"],
             t["created_at"]
-        ])
-    return result
+        ]
+        for t in tweets
+    ]
+    return result, next_cursor
+
+def fetch_tweets(query, max_results=20, since_id=None):
+    return fetch_query(query, max_results, since_id)[0]
+
+# --- Run all queries concurrently, only pulling tweets newer than last run ---
+# Yields rows one query at a time. Incremental runs record the new cursors in
+# `state`; call save_state(state) only once the rows are stored.
+def iter_all(queries=QUERIES, max_tweets=MAX_TWEETS_PER_QUERY, incremental=True, state=None):
+    if state is None:
+        state = load_state() if incremental else {}
+    cursors = dict(state)
 
-# --- Function to upload data to Google Sheets ---
+    with ThreadPoolExecutor(max_workers=TWITTER_WORKERS) as pool:
+        results = pool.map(
+            lambda q: fetch_query(q, max_tweets, cursors.get(q)),
+            queries
+        )
+
+        for q, (rows, next_cursor) in zip(queries, results):
+            yield from rows
+            if incremental and next_cursor:
+                state[q] = next_cursor
+
+def fetch_all(queries=QUERIES, max_tweets=MAX_TWEETS_PER_QUERY, incremental=True):
+    return list(iter_all(queries, max_tweets, incremental))
+
+# --- Function to append data to Google Sheets ---
 def upload_to_sheet(values):
-    creds = service_account.Credentials.from_service_account_file(
-        "credentials.json",
-        scopes=["https://www.googleapis.com/auth/spreadsheets"]
-    )
-    service = build("sheets", "v4", credentials=creds)
-    body = {"values": [["Topic", "Text", "Author ID", "Likes", "Created At"]] + values}
-
-    # Upload to the 'twitter' tab in Google Sheet
-    service.spreadsheets().values().update(
-        spreadsheetId="1jI2vj3Gwhzgp76ERdB9Sou8JaqpnIpcIBV2oqldh-6M",
-        range="sheet1!A1",
-        valueInputOption="RAW",
-        body=body
-    ).execute()
-    print(f" Uploaded {len(values)} tweets to Google Sheet (tab: twitter)!")
+    service = sheets_service("credentials.json")
+    spreadsheet_id = "1jI2vj3Gwhzgp76ERdB9Sou8JaqpnIpcIBV2oqldh-6M"
+
+    # Header row only when the tab is still empty
+    existing = execute(service.spreadsheets().values().get(
+        spreadsheetId=spreadsheet_id,
+        range="sheet1!A1:E1"
+    ), "read")
+    header = [] if existing.get("values") else [["Topic", "Text", "Author ID", "Likes", "Created At"]]
+
+    # Append to the 'twitter' tab in Google Sheet (new tweets only, values can be a generator)
+    count = append_values(service, spreadsheet_id, "sheet1", chain(header, values)) - len(header)
+
+    if not count:
+        print(" No new tweets since the last run.")
+        return
+    print(f" Uploaded {count} tweets to Google Sheet (tab: twitter)!")
 
 # --- Run script ---
 if __name__ == "__main__":
-    all_tweets = []
-    for q in QUERIES:
-        all_tweets.extend(fetch_tweets(q, max_results=20))
-        time.sleep(2)  
-    upload_to_sheet(all_tweets)
+    state = load_state()
+    upload_to_sheet(iter_all(QUERIES, state=state))
+    save_state(state)  # only after every row reached the sheet
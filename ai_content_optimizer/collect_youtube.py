@@ -1,67 +1,102 @@
 # --- Import libraries ---
 from dotenv import load_dotenv
-import os, time
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
+import os
 from googleapiclient.errors import HttpError
+from transport import get_discovery_client, sheets_service
+from itertools import chain, islice
+from sheets_quota import execute
+from sinks import append_values
 
 # --- Load environment variables ---
 load_dotenv()
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 
 # --- Connect to YouTube API ---
-youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+# YOUTUBE_API_URL points the client at another endpoint (e.g. a local stub)
+YOUTUBE_API_URL = os.getenv("YOUTUBE_API_URL")
+def youtube():
+    """This thread's YouTube client (built on first use, never shared across threads)"""
+    return get_discovery_client(
+        "youtube", "v3", developer_key=YOUTUBE_API_KEY, api_endpoint=YOUTUBE_API_URL
+    )
 
 # --- Choose search keyword ---
 SEARCH_QUERY = "digital marketing"  # You can change this to any topic
 
-# --- Fetch YouTube videos ---
-def fetch_youtube_videos(max_videos=100):
-    videos = []
-    request = youtube.search().list(
-        part="snippet",
-        q=SEARCH_QUERY,
-        type="video",
-        maxResults=89
-    )
-    response = request.execute()
+# --- API page limits ---
+SEARCH_PAGE_SIZE = 50   # search().list maxResults cap
+STATS_BATCH_SIZE = 50   # video IDs per videos().list call
+
+# --- Page through search results until max_videos are found ---
+def iter_search_pages(max_videos):
+    client = youtube()
+    fetched, page_token = 0, None
+    while fetched < max_videos:
+        response = client.search().list(
+            part="snippet",
+            q=SEARCH_QUERY,
+            type="video",
+            maxResults=min(SEARCH_PAGE_SIZE, max_videos - fetched),
+            pageToken=page_token
+        ).execute()
 
-    for item in response["items"]:
-        video_id = item["id"]["videoId"]
-        title = item["snippet"]["title"]
-        channel = item["snippet"]["channelTitle"]
-        url = f"https://www.youtube.com/watch?v={video_id}"
+        items = response.get("items", [])[:max_videos - fetched]
+        fetched += len(items)
+        yield items
 
-        # Get video statistics (views, likes)
-        stats_req = youtube.videos().list(part="statistics", id=video_id)
-        stats_res = stats_req.execute()
-        stats = stats_res["items"][0]["statistics"]
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
 
-        views = stats.get("viewCount", "0")
-        likes = stats.get("likeCount", "0")
+def search_videos(max_videos):
+    return [item for page in iter_search_pages(max_videos) for item in page]
+
+# --- Statistics for up to 50 videos per request ---
+def fetch_statistics(video_ids):
+    client = youtube()
+    stats = {}
+    for i in range(0, len(video_ids), STATS_BATCH_SIZE):
+        batch = video_ids[i:i + STATS_BATCH_SIZE]
+        response = client.videos().list(
+            part="statistics",
+            id=",".join(batch),
+            maxResults=STATS_BATCH_SIZE
+        ).execute()
+        for item in response.get("items", []):
+            stats[item["id"]] = item.get("statistics", {})
+    return stats
 
-        videos.append([title, channel, views, likes, url])
-        if len(videos) >= max_videos:
-            break
-        time.sleep(0.2)
+# --- Fetch YouTube videos (yields rows one search page at a time) ---
+def iter_youtube_videos(max_videos=100):
+    for items in iter_search_pages(max_videos):
+        stats = fetch_statistics([item["id"]["videoId"] for item in items])
 
-    return videos
+        for item in items:
+            video_id = item["id"]["videoId"]
+            title = item["snippet"]["title"]
+            channel = item["snippet"]["channelTitle"]
+            url = f"https://www.youtube.com/watch?v={video_id}"
+
+            # Get video statistics (views, likes)
+            video_stats = stats.get(video_id, {})
+            views = video_stats.get("viewCount", "0")
+            likes = video_stats.get("likeCount", "0")
+
+            yield [title, channel, views, likes, url]
+
+def fetch_youtube_videos(max_videos=100):
+    return list(iter_youtube_videos(max_videos))
 
 
 # --- Upload to Google Sheets ---
 def upload_to_sheet(values):
-    creds = service_account.Credentials.from_service_account_file(
-        "credentials.json",
-        scopes=["https://www.googleapis.com/auth/spreadsheets"]
-    )
-
-    service = build("sheets", "v4", credentials=creds)
+    service = sheets_service("credentials.json")
 
     SPREADSHEET_ID = "1jI2vj3Gwhzgp76ERdB9Sou8JaqpnIpcIBV2oqldh-6M"
     TAB_NAME = "youtube"
 
     # Step 1: Ensure the "youtube" tab exists, or create it
-    sheet_metadata = service.spreadsheets().get(spreadsheetId=SPREADSHEET_ID).execute()
+    sheet_metadata = execute(service.spreadsheets().get(spreadsheetId=SPREADSHEET_ID), "read")
     sheet_titles = [s["properties"]["title"] for s in sheet_metadata["sheets"]]
 
     if TAB_NAME not in sheet_titles:
@@ -69,34 +104,32 @@ def upload_to_sheet(values):
         add_sheet_request = {
             "requests": [{"addSheet": {"properties": {"title": TAB_NAME}}}]
         }
-        service.spreadsheets().batchUpdate(
+        execute(service.spreadsheets().batchUpdate(
             spreadsheetId=SPREADSHEET_ID, body=add_sheet_request
-        ).execute()
+        ))
         print(f"Tab '{TAB_NAME}' created successfully!")
 
+    # Pull the first page (search + statistics) before touching the tab: a
+    # quota / API error at the start then leaves the previous data in place
+    values = iter(values)
+    first = list(islice(values, 1))
+
     #Step 2: Clear old data
     try:
-        service.spreadsheets().values().clear(
+        execute(service.spreadsheets().values().clear(
             spreadsheetId=SPREADSHEET_ID,
             range=f"{TAB_NAME}!A1:Z"
-        ).execute()
+        ))
     except HttpError as e:
         print(" Error clearing data:", e)
 
-    # Step 3: Upload new YouTube data
-    body = {"values": [["Title", "Channel", "Views", "Likes", "URL"]] + values}
-
-    service.spreadsheets().values().update(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"{TAB_NAME}!A1",
-        valueInputOption="RAW",
-        body=body
-    ).execute()
+    # Step 3: Upload new YouTube data (values can be a generator; sent in chunks)
+    rows = chain([["Title", "Channel", "Views", "Likes", "URL"]], first, values)
+    count = append_values(service, SPREADSHEET_ID, TAB_NAME, rows) - 1
 
-    print(f" Uploaded {len(values)} YouTube videos to Google Sheet (tab: {TAB_NAME})!")
+    print(f" Uploaded {count} YouTube videos to Google Sheet (tab: {TAB_NAME})!")
 
 
 # --- Run script ---
 if __name__ == "__main__":
-    data = fetch_youtube_videos(100)
-    upload_to_sheet(data)
+    upload_to_sheet(iter_youtube_videos(100))
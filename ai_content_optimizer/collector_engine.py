@@ -0,0 +1,379 @@
+"""
+Unified Collector Engine
+------------------------
+- One asyncio run collects every platform concurrently
+- Each platform is a plugin (CollectorPlugin) that yields posts in one
+  normalized schema: the columns of sample_data.csv
+- Per-platform concurrency limits: a plugin never has more than
+  `concurrency` blocking API calls in flight
+- Plugins reuse the existing collect_* modules; API base URLs can be
+  pointed at local stub servers via TWITTER_SEARCH_URL, IG_GRAPH_URL,
+  YOUTUBE_API_URL and REDDIT_OAUTH_URL / REDDIT_URL
+- Records stream into sinks as they arrive (see sinks.py): appended to
+  COLLECTOR_OUTPUT_FILE, plus a Parquet dataset (COLLECTOR_PARQUET_DIR)
+  and a storage tab (COLLECTOR_SHEET_TAB) when configured
+- Posts already collected in an earlier run (dedup_index.py) are skipped
+  before statistics / insights calls and before any write; --full
+  collects and writes everything again
+
+Usage: python collector_engine.py [twitter reddit youtube instagram] [--incremental] [--full]
+"""
+
+# ===============================
+# IMPORTS
+# ===============================
+import os
+import sys
+import time
+import asyncio
+import functools
+from collections import deque
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from sinks import CsvSink, ParquetSink, StorageSink, MemorySink
+from dedup_index import DedupIndex
+from watermarks import is_full_run
+
+# ===============================
+# LOAD ENV
+# ===============================
+load_dotenv()
+
+OUTPUT_FILE = os.getenv("COLLECTOR_OUTPUT_FILE", "collected_posts.csv")
+PARQUET_DIR = os.getenv("COLLECTOR_PARQUET_DIR")
+SHEET_TAB = os.getenv("COLLECTOR_SHEET_TAB")
+
+# ===============================
+# NORMALIZED SCHEMA
+# ===============================
+NORMALIZED_FIELDS = [
+    "platform", "post_id", "text_or_caption", "created_at",
+    "likes", "retweets", "replies",
+    "engagement", "impressions", "reach", "saved",
+]
+METRIC_FIELDS = NORMALIZED_FIELDS[4:]
+
+def normalize_record(platform, post_id, text=None, created_at=None, **metrics):
+    """One post in the normalized schema; metrics a platform lacks stay empty"""
+    unknown = set(metrics) - set(METRIC_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown metric fields: {sorted(unknown)}")
+
+    record = dict.fromkeys(NORMALIZED_FIELDS, "")
+    record["platform"] = platform
+    record["post_id"] = str(post_id)
+    record["text_or_caption"] = (text or "").replace("\n", " ").strip()
+    record["created_at"] = created_at or ""
+    for name, value in metrics.items():
+        record[name] = "" if value is None else value
+    return record
+
+def iso_utc(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+# ===============================
+# PLUGIN BASE
+# ===============================
+class RunContext:
+    """Per-plugin view of a run: its concurrency limit, dedup index and run options"""
+
+    def __init__(self, concurrency, executor, incremental=False, dedup=None, commits=None):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.executor = executor
+        self.incremental = incremental
+        self.dedup = dedup
+        self.commits = commits if commits is not None else []
+
+    def on_commit(self, fn, *args):
+        """
+        Defers fn(*args) (e.g. saving a watermark) until the run's records
+        are safely written: run() calls it after every sink closed cleanly
+        """
+        self.commits.append(functools.partial(fn, *args))
+
+    def unseen(self, platform, post_ids):
+        """Ids worth a follow-up call (all of them when dedup is off)"""
+        if self.dedup is None:
+            return set(map(str, post_ids))
+        return set(self.dedup.unseen(platform, post_ids))
+
+    async def call(self, fn, *args, **kwargs):
+        """Runs a blocking API call on the worker pool, within the plugin's limit"""
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, functools.partial(fn, *args, **kwargs)
+            )
+
+class CollectorPlugin:
+    """
+    Subclasses set name / required_env / concurrency and implement
+    collect(ctx) as an async generator of normalize_record() dicts
+    """
+    name = ""
+    required_env = ()
+    concurrency = 2
+
+    def is_configured(self):
+        return all(os.getenv(var) for var in self.required_env)
+
+    async def collect(self, ctx):
+        raise NotImplementedError
+        yield
+
+PLUGINS = {}
+
+def register(plugin_cls):
+    PLUGINS[plugin_cls.name] = plugin_cls()
+    return plugin_cls
+
+# ===============================
+# PLUGINS
+# ===============================
+@register
+class TwitterPlugin(CollectorPlugin):
+    name = "twitter"
+    required_env = ("TWITTER_BEARER_TOKEN",)
+    concurrency = int(os.getenv("TWITTER_WORKERS", "3"))
+
+    async def collect(self, ctx):
+        import collect_twitter as tw
+
+        state = tw.load_state() if ctx.incremental else {}
+
+        async def one(query):
+            return query, await ctx.call(
+                tw.fetch_raw, query, tw.MAX_TWEETS_PER_QUERY, state.get(query)
+            )
+
+        for job in asyncio.as_completed([one(q) for q in tw.QUERIES]):
+            query, (tweets, cursor) = await job
+            for t in tweets:
+                metrics = t.get("public_metrics", {})
+                yield normalize_record(
+                    self.name, t["id"], t["text"], t.get("created_at"),
+                    likes=metrics.get("like_count"),
+                    retweets=metrics.get("retweet_count"),
+                    replies=metrics.get("reply_count"),
+                    impressions=metrics.get("impression_count"),
+                )
+            if cursor:
+                state[query] = cursor
+
+        if ctx.incremental:
+            ctx.on_commit(tw.save_state, state)
+
+@register
+class RedditPlugin(CollectorPlugin):
+    name = "reddit"
+    required_env = ("REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET")
+    concurrency = int(os.getenv("REDDIT_WORKERS", "4"))
+
+    async def collect(self, ctx):
+        import collect_reddit as rd
+
+        state = rd.load_state() if ctx.incremental else {}
+
+        async def one(sub):
+            return sub, await ctx.call(
+                rd.fetch_submissions, sub, rd.POSTS_PER_SUB, ctx.incremental, state.get(sub)
+            )
+
+        for job in asyncio.as_completed([one(s) for s in rd.SUBREDDITS]):
+            sub, (submissions, newest) = await job
+            for post in submissions:
+                yield normalize_record(
+                    self.name, post.id, post.title, iso_utc(post.created_utc),
+                    likes=post.score,
+                    replies=post.num_comments,
+                )
+            if newest is not None:
+                state[sub] = newest
+
+        if ctx.incremental:
+            ctx.on_commit(rd.save_state, state)
+
+@register
+class YouTubePlugin(CollectorPlugin):
+    name = "youtube"
+    required_env = ("YOUTUBE_API_KEY",)
+    concurrency = 1  # the googleapiclient client (httplib2) is not thread-safe
+
+    async def collect(self, ctx):
+        import collect_youtube as yt
+
+        max_videos = int(os.getenv("YOUTUBE_MAX_VIDEOS", "100"))
+        pages = yt.iter_search_pages(max_videos)
+
+        # One search page (and its statistics call) at a time
+        while True:
+            items = await ctx.call(next, pages, None)
+            if items is None:
+                break
+            new_ids = ctx.unseen(self.name, [item["id"]["videoId"] for item in items])
+            items = [item for item in items if item["id"]["videoId"] in new_ids]
+            if not items:
+                continue
+            stats = await ctx.call(yt.fetch_statistics, [item["id"]["videoId"] for item in items])
+
+            for item in items:
+                video_id = item["id"]["videoId"]
+                video_stats = stats.get(video_id, {})
+                yield normalize_record(
+                    self.name, video_id, item["snippet"]["title"], item["snippet"].get("publishedAt"),
+                    likes=video_stats.get("likeCount"),
+                    replies=video_stats.get("commentCount"),
+                    impressions=video_stats.get("viewCount"),
+                )
+
+@register
+class InstagramPlugin(CollectorPlugin):
+    name = "instagram"
+    required_env = ("IG_ACCESS_TOKEN", "IG_USER_ID")
+    concurrency = int(os.getenv("IG_INSIGHTS_WORKERS", "4"))
+
+    async def collect(self, ctx):
+        import collect_instagram as ig
+
+        def records(chunk, insights_by_id):
+            for m in chunk:
+                insights = insights_by_id.get(m["id"], {})
+                yield normalize_record(
+                    self.name, m["id"], m.get("caption"), m.get("timestamp"),
+                    engagement=insights.get("engagement"),
+                    impressions=insights.get("impressions"),
+                    reach=insights.get("reach"),
+                    saved=insights.get("saved"),
+                )
+
+        # Insights batches start while later media pages are still loading;
+        # at most MAX_PENDING_BATCHES chunks are held at once
+        pending = deque()
+        url, params = ig.first_media_page(ig.IG_USER_ID)
+        while url:
+            items, url = await ctx.call(ig.fetch_media_page, url, params)
+            params = {}
+            new_ids = ctx.unseen(self.name, [m["id"] for m in items])
+            items = [m for m in items if m["id"] in new_ids]
+            for chunk in ig._chunks(items, ig.BATCH_SIZE):
+                ids = [m["id"] for m in chunk]
+                pending.append((chunk, asyncio.ensure_future(ctx.call(ig.fetch_insights_batch, ids))))
+            while len(pending) >= ig.MAX_PENDING_BATCHES:
+                chunk, job = pending.popleft()
+                for record in records(chunk, await job):
+                    yield record
+
+        while pending:
+            chunk, job = pending.popleft()
+            for record in records(chunk, await job):
+                yield record
+
+# ===============================
+# ENGINE
+# ===============================
+async def _drain(plugin, ctx, sinks):
+    started = time.perf_counter()
+    count = 0
+    try:
+        async for record in plugin.collect(ctx):
+            if ctx.dedup is not None:
+                if ctx.dedup.seen(record["platform"], record["post_id"]):
+                    continue
+                ctx.dedup.add(record["platform"], record["post_id"])
+            for sink in sinks:
+                sink.write(record)
+            count += 1
+    except Exception as e:
+        print(f"❌ {plugin.name} collector failed after {count} posts: {e}")
+        return count
+    print(f"✅ {plugin.name}: {count} posts in {time.perf_counter() - started:.1f}s")
+    return count
+
+async def collect_all(sinks, platforms=None, incremental=False, dedup=None, commits=None):
+    """
+    Runs the selected (default: all configured) plugins concurrently,
+    streaming every record not yet in `dedup` into `sinks`.
+    Deferred state saves (RunContext.on_commit) are appended to `commits`
+    for the caller to run once the sinks are flushed; without a list
+    they run when collection ends.
+    Returns {platform: new posts}.
+    """
+    deferred = [] if commits is None else commits
+    selected = []
+    for name in platforms or PLUGINS:
+        plugin = PLUGINS[name]
+        if plugin.is_configured():
+            selected.append(plugin)
+        else:
+            print(f"⚠️ Skipping {name}: set {', '.join(plugin.required_env)}")
+
+    if not selected:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=sum(p.concurrency for p in selected)) as executor:
+        counts = await asyncio.gather(*(
+            _drain(p, RunContext(p.concurrency, executor, incremental, dedup, deferred), sinks)
+            for p in selected
+        ))
+
+    if commits is None:
+        for commit in deferred:
+            commit()
+    return {p.name: n for p, n in zip(selected, counts)}
+
+def run(sinks, platforms=None, incremental=False, dedup=None):
+    """
+    Collects into the given sinks and closes them. Posts are committed
+    to the dedup index, and watermarks saved, only once every sink closed
+    cleanly, so a failed write is collected again next run.
+    """
+    commits = []
+    try:
+        try:
+            counts = asyncio.run(collect_all(sinks, platforms, incremental, dedup, commits))
+        finally:
+            for sink in sinks:
+                sink.close()
+    except BaseException:
+        if dedup is not None:
+            dedup.rollback()
+        raise
+
+    if dedup is not None:
+        dedup.commit()
+    for commit in commits:
+        commit()
+    return counts
+
+def collect_records(platforms=None, incremental=False, dedup=None):
+    """Whole run as a list of records (small runs only)"""
+    sink = MemorySink(NORMALIZED_FIELDS)
+    run([sink], platforms, incremental, dedup)
+    return sink.records
+
+def default_sinks():
+    sinks = [CsvSink(OUTPUT_FILE, NORMALIZED_FIELDS)]
+    if PARQUET_DIR:
+        sinks.append(ParquetSink(PARQUET_DIR, NORMALIZED_FIELDS))
+    if SHEET_TAB:
+        sinks.append(StorageSink(SHEET_TAB, NORMALIZED_FIELDS))
+    return sinks
+
+# ===============================
+# MAIN
+# ===============================
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    incremental = "--incremental" in args
+    platforms = [a for a in args if not a.startswith("--")]
+
+    unknown = [p for p in platforms if p not in PLUGINS]
+    if unknown:
+        sys.exit(f"Unknown platform(s): {', '.join(unknown)}. Choose from: {', '.join(PLUGINS)}")
+
+    # --full: bypass the index and write everything again
+    dedup = None if is_full_run() else DedupIndex()
+    counts = run(default_sinks(), platforms or None, incremental, dedup)
+    print(f"✅ Appended {sum(counts.values())} new posts to {OUTPUT_FILE}")
@@ -5,7 +5,9 @@ Milestone 2 – Content Generation Engine
 ✔ Separate worksheet for AI-generated content
 ✔ Does NOT touch twitter / reddit / youtube tabs
 ✔ Platform-optimized prompts
-✔ Google Sheets + Slack integration
+✔ Concurrent batch generation (many topics × platforms)
+✔ On-disk response cache (fresh=True bypasses it)
+✔ Storage layer (Google Sheets / SQLite) + Slack integration
 ✔ Secure .env usage
 """
 
@@ -13,14 +15,19 @@ Milestone 2 – Content Generation Engine
 # IMPORTS
 # ===============================
 import os
+import sys
+import time
+import threading
 from datetime import datetime
-import requests
+from concurrent.futures import ThreadPoolExecutor
 
 import google.generativeai as genai
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from dotenv import load_dotenv
 
+from notifications import notify
+from storage import get_storage, sheets_enabled
+from response_cache import ResponseCache, cache_key
+
 # ===============================
 # LOAD ENV
 # ===============================
@@ -32,15 +39,26 @@ GEMINI_MODEL = os.getenv("GEMINI_MODEL")
 SERVICE_ACCOUNT_FILE = os.getenv("GSPREAD_SERVICE_ACCOUNT_FILE")
 SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
 
-SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
+# Max concurrent Gemini requests in generate_batch()
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "8"))
+
+# Set GENERATION_CACHE=0 to always call Gemini
+GENERATION_CACHE = os.getenv("GENERATION_CACHE", "1") != "0"
 
 # Dedicated worksheet for AI content
 CONTENT_SHEET_NAME = "Content_Creation"
+CONTENT_HEADERS = [
+    "Timestamp",
+    "Topic",
+    "Platform",
+    "Generated_Content",
+    "Source"
+]
 
 if not GEMINI_API_KEY or not GEMINI_MODEL:
     raise EnvironmentError("❌ Gemini API configuration missing")
 
-if not SERVICE_ACCOUNT_FILE or not SPREADSHEET_ID:
+if sheets_enabled() and (not SERVICE_ACCOUNT_FILE or not SPREADSHEET_ID):
     raise EnvironmentError("❌ Google Sheets configuration missing")
 
 # ===============================
@@ -49,56 +67,15 @@ if not SERVICE_ACCOUNT_FILE or not SPREADSHEET_ID:
 genai.configure(api_key=GEMINI_API_KEY)
 
 # ===============================
-# GOOGLE SHEETS CONNECTION
+# PROMPTS
 # ===============================
-def connect_sheet():
-    scope = ["https://www.googleapis.com/auth/spreadsheets"]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(
-        SERVICE_ACCOUNT_FILE, scope
-    )
-    client = gspread.authorize(creds)
-    return client.open_by_key(SPREADSHEET_ID)
-
-def get_content_sheet(spreadsheet):
-    """
-    Creates Content_Creation sheet if missing
-    """
-    try:
-        ws = spreadsheet.worksheet(CONTENT_SHEET_NAME)
-    except gspread.exceptions.WorksheetNotFound:
-        ws = spreadsheet.add_worksheet(
-            title=CONTENT_SHEET_NAME,
-            rows="1000",
-            cols="10"
-        )
-        ws.append_row([
-            "Timestamp",
-            "Topic",
-            "Platform",
-            "Generated_Content",
-            "Source"
-        ])
-    return ws
+PLATFORMS = ["reddit", "twitter", "youtube"]
 
-# ===============================
-# SLACK NOTIFICATION
-# ===============================
-def send_slack(message):
-    if not SLACK_WEBHOOK_URL:
-        return
-    try:
-        requests.post(SLACK_WEBHOOK_URL, json={"text": message}, timeout=5)
-    except Exception:
-        pass
-
-# ===============================
-# CONTENT GENERATION
-# ===============================
-def generate_content(topic, platform):
+def build_prompt(topic, platform):
     platform = platform.lower()
 
     if platform == "reddit":
-        prompt = f"""
+        return f"""
 You are a genuine Reddit user.
 
 Write a **natural discussion post (120–180 words)** about:
@@ -112,7 +89,7 @@ Rules:
 """
 
     elif platform == "twitter":
-        prompt = f"""
+        return f"""
 Write **2 tweets** about:
 "{topic}"
 
@@ -124,7 +101,7 @@ Rules:
 """
 
     elif platform == "youtube":
-        prompt = f"""
+        return f"""
 Create YouTube-ready content for:
 "{topic}"
 
@@ -136,59 +113,146 @@ Include:
 Tone: Informative, professional
 """
 
-    else:
-        raise ValueError("❌ Platform must be reddit, twitter, or youtube")
+    raise ValueError("❌ Platform must be reddit, twitter, or youtube")
 
-    model = genai.GenerativeModel(GEMINI_MODEL)
-    response = model.generate_content(prompt)
-    return response.text.strip()
+# ===============================
+# MODEL REUSE
+# ===============================
+# One GenerativeModel per worker thread, created on first use
+_models = threading.local()
+
+def get_model():
+    model = getattr(_models, "model", None)
+    if model is None:
+        model = genai.GenerativeModel(GEMINI_MODEL)
+        _models.model = model
+    return model
 
 # ===============================
-# SAVE TO GOOGLE SHEET
+# RESPONSE CACHE
 # ===============================
-def save_content(ws, topic, platform, content):
-    ws.append_row(
-        [
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            topic,
-            platform,
-            content,
-            "AI_Generated"
-        ],
+response_cache = ResponseCache() if GENERATION_CACHE else None
+
+def cache_stats():
+    return response_cache.stats() if response_cache else {}
+
+# ===============================
+# CONTENT GENERATION
+# ===============================
+def generate_content(topic, platform, fresh=False):
+    """
+    fresh=True skips the cache lookup (the new copy still replaces the cached one)
+    """
+    prompt = build_prompt(topic, platform)
+    key = cache_key(prompt, platform, GEMINI_MODEL)
+
+    if response_cache and not fresh:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+
+    started = time.perf_counter()
+    response = get_model().generate_content(prompt)
+    content = response.text.strip()
+
+    if response_cache:
+        response_cache.put(key, content, time.perf_counter() - started)
+    return content
+
+def _run_job(topic, platform, fresh=False):
+    started = time.perf_counter()
+    result = {"topic": topic, "platform": platform.lower(), "content": "", "error": None}
+    try:
+        result["content"] = generate_content(topic, platform, fresh)
+    except Exception as e:
+        result["error"] = str(e)
+    result["latency"] = round(time.perf_counter() - started, 3)
+    return result
+
+def generate_batch(jobs, max_workers=GENERATION_WORKERS, fresh=False):
+    """
+    jobs: iterable of (topic, platform)
+    Runs up to max_workers Gemini calls at once and returns one dict per
+    job, in input order: topic, platform, content, error, latency (seconds)
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        return list(pool.map(lambda job: _run_job(*job, fresh=fresh), jobs))
+
+# ===============================
+# SAVE TO CONTENT_CREATION
+# ===============================
+def save_contents(items, store=None):
+    """
+    items: iterable of (topic, platform, content)
+    Appends them to Content_Creation in one batch (tab created with headers if missing)
+    """
+    store = store or get_storage()
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    store.append_rows(
+        CONTENT_SHEET_NAME,
+        [[now, topic, platform, content, "AI_Generated"] for topic, platform, content in items],
+        headers=CONTENT_HEADERS,
         value_input_option="USER_ENTERED"
     )
 
+def save_content(topic, platform, content, store=None):
+    save_contents([(topic, platform, content)], store)
+
 # ===============================
 # MAIN
 # ===============================
 def main():
     print("\n🚀 AI Content Creation Engine Started\n")
 
-    topic = input("Enter topic: ").strip()
-    platform = input("Enter platform (reddit / twitter / youtube): ").strip()
-
-    print("\n🔄 Generating optimized content...\n")
-    content = generate_content(topic, platform)
+    topics = [t.strip() for t in input("Enter topic(s), comma-separated: ").split(",") if t.strip()]
+    platforms = input("Enter platform(s) (reddit / twitter / youtube / all): ").strip().lower()
+    platforms = PLATFORMS if platforms == "all" else [p.strip() for p in platforms.split(",") if p.strip()]
+
+    jobs = [(topic, platform) for topic in topics for platform in platforms]
+
+    print(f"\n🔄 Generating {len(jobs)} piece(s) of content...\n")
+    started = time.perf_counter()
+    results = generate_batch(jobs, fresh="--fresh" in sys.argv)
+    elapsed = time.perf_counter() - started
+
+    for r in results:
+        if r["error"]:
+            print(f"❌ {r['topic']} / {r['platform']} failed after {r['latency']}s: {r['error']}")
+        else:
+            print(f"📄 {r['topic']} / {r['platform']} ({r['latency']}s):\n")
+            print(r["content"] + "\n")
+
+    done = [(r["topic"], r["platform"], r["content"]) for r in results if not r["error"]]
+    print(f"⏱️ {len(done)}/{len(jobs)} generated in {elapsed:.1f}s")
+    if response_cache:
+        stats = cache_stats()
+        print(
+            f"🗃️ Cache: {stats['hits']} hit(s), {stats['misses']} miss(es), "
+            f"~{stats['saved_seconds']}s of generation saved"
+        )
 
-    print("📄 Generated Content:\n")
-    print(content)
+    if not done:
+        return
 
     try:
-        spreadsheet = connect_sheet()
-        ws = get_content_sheet(spreadsheet)
-        save_content(ws, topic, platform, content)
+        save_contents(done)
 
-        send_slack(
+        notify(
             f"✅ *AI Content Created*\n"
-            f"Topic: {topic}\n"
-            f"Platform: {platform}\n"
+            f"Items: {len(done)}/{len(jobs)}\n"
+            f"Topics: {', '.join(topics)}\n"
+            f"Platforms: {', '.join(platforms)}\n"
             f"Saved in Content_Creation sheet"
         )
 
         print("\n✅ Content saved to Content_Creation sheet")
 
     except Exception as e:
-        send_slack(f"❌ Content creation failed: {e}")
+        notify(f"❌ Content creation failed: {e}")
         print("\n❌ Error saving content")
         print(e)
 
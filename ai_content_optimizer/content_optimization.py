@@ -2,10 +2,12 @@
 Milestone 2 – Module 1
 Rule-Based Content Optimization Engine
 -------------------------------------
-- Reads generated marketing content from Google Sheets
+- Reads generated marketing content through the storage layer
+  (Google Sheets, SQLite, or SQLite synced to Sheets)
 - Applies deterministic optimization rules
 - Calculates optimization score (0–10)
-- Updates optimized content + score in Google Sheets
+- Updates optimized content + score (batched write-back)
+- Incremental: skips rows whose content + rules are unchanged (--full to redo all)
 - Sends Slack notification
 """
 
@@ -14,11 +16,13 @@ Rule-Based Content Optimization Engine
 # ===============================
 import os
 import re
-import gspread
-import requests
-from oauth2client.service_account import ServiceAccountCredentials
 from dotenv import load_dotenv
 
+from notifications import notify
+from storage import get_storage, sheets_enabled
+from text_features import text_features
+from watermarks import content_hash, is_full_run, is_unchanged
+
 # ===============================
 # LOAD ENV
 # ===============================
@@ -30,24 +34,15 @@ SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
 # ⚠️ THIS MUST BE YOUR CONTENT CREATION SHEET (NOT twitter/reddit)
 WORKSHEET_NAME = os.getenv("CONTENT_CREATION_SHEET", "Content_Creation")
 
-SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
+# Bump whenever optimize_content / calculate_score change,
+# so incremental runs recompute every row once
+RULES_VERSION = "2"
 
-if not SERVICE_ACCOUNT_FILE or not SPREADSHEET_ID:
-    raise EnvironmentError("❌ Google Sheets configuration missing")
+# Written in this order when missing from the sheet
+OUTPUT_COLUMNS = ["Optimized_Content", "Optimization_Score", "Optimization_Hash"]
 
-# ===============================
-# CONNECT TO GOOGLE SHEET
-# ===============================
-def connect_sheet():
-    scope = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(
-        SERVICE_ACCOUNT_FILE, scope
-    )
-    client = gspread.authorize(creds)
-    return client.open_by_key(SPREADSHEET_ID).worksheet(WORKSHEET_NAME)
+if sheets_enabled() and (not SERVICE_ACCOUNT_FILE or not SPREADSHEET_ID):
+    raise EnvironmentError("❌ Google Sheets configuration missing")
 
 # ===============================
 # COLUMN HELPERS
@@ -64,30 +59,63 @@ def find_platform(row_dict):
             return str(value).strip().lower()
     return ""
 
+# ===============================
+# RULE TABLES (built once)
+# ===============================
+HASHTAG_RE = re.compile(r"#\w+")
+
+CTA_MAP = {
+    "twitter": "👉 What’s your take? Reply below!",
+    "youtube": "🔔 Like, subscribe & comment!",
+    "reddit": "🧠 Let’s discuss.",
+    "linkedin": "💬 Share your thoughts in the comments."
+}
+DEFAULT_CTA = "📢 Let us know your thoughts!"
+
+def _as_list(values):
+    """list / tuple / pandas Series / NumPy or Arrow array -> Python list"""
+    if hasattr(values, "to_pylist"):
+        return values.to_pylist()
+    if hasattr(values, "tolist"):
+        return values.tolist()
+    return list(values)
+
+def _broadcast(values, n):
+    """One platform string for every row, or one per row"""
+    if isinstance(values, str):
+        return [values] * n
+    values = _as_list(values)
+    if len(values) != n:
+        raise ValueError(f"❌ Expected {n} values, got {len(values)}")
+    return values
+
 # ===============================
 # OPTIMIZATION RULES
 # ===============================
 def optimize_content(text, platform):
-    text = re.sub(r"\s+", " ", text).strip()
+    # Same as re.sub(r"\s+", " ", text).strip(): both use Unicode whitespace
+    text = " ".join(text.split())
 
-    hashtags = re.findall(r"#\w+", text)
-    hashtags = list(dict.fromkeys(hashtags))[:3]
-    text = re.sub(r"#\w+", "", text).strip()
+    hashtags = []
+    if "#" in text:
+        hashtags = list(dict.fromkeys(HASHTAG_RE.findall(text)))[:3]
+        text = HASHTAG_RE.sub("", text).strip()
 
-    cta_map = {
-        "twitter": "👉 What’s your take? Reply below!",
-        "youtube": "🔔 Like, subscribe & comment!",
-        "reddit": "🧠 Let’s discuss.",
-        "linkedin": "💬 Share your thoughts in the comments."
-    }
-
-    optimized = f"{text}\n\n{cta_map.get(platform, '📢 Let us know your thoughts!')}"
+    optimized = f"{text}\n\n{CTA_MAP.get(platform, DEFAULT_CTA)}"
 
     if hashtags:
         optimized += "\n\n" + " ".join(hashtags)
 
     return optimized
 
+def optimize_many(texts, platforms):
+    """optimize_content over a list / Series / Arrow array; platforms may be one string"""
+    texts = _as_list(texts)
+    return [
+        optimize_content(text, platform)
+        for text, platform in zip(texts, _broadcast(platforms, len(texts)))
+    ]
+
 # ===============================
 # SCORE (0–10)
 # ===============================
@@ -97,68 +125,48 @@ def calculate_score(original, optimized, platform):
     if len(optimized) <= len(original):
         score += 2
 
-    if any(w in optimized.lower() for w in ["reply", "comment", "subscribe", "discuss"]):
+    features = text_features(optimized)
+    if features.hit("engagement"):
         score += 3
 
-    if 1 <= len(re.findall(r"#\w+", optimized)) <= 3:
+    if 1 <= len(features.hashtags) <= 3:
         score += 3
 
-    platform_words = {
-        "twitter": "reply",
-        "youtube": "subscribe",
-        "reddit": "discuss",
-        "linkedin": "comment",
-    }
-
-    if platform in platform_words and platform_words[platform] in optimized.lower():
+    if features.hit(f"cta:{platform}"):
         score += 2
 
     return min(score, 10)
 
-# ===============================
-# SLACK NOTIFICATION
-# ===============================
-def send_slack(count):
-    if not SLACK_WEBHOOK_URL:
-        return
-
-    payload = {
-        "text": f"✅ Content Optimization Completed\nOptimized Rows: {count}"
-    }
-
-    try:
-        requests.post(SLACK_WEBHOOK_URL, json=payload, timeout=5)
-    except Exception:
-        pass
+def score_many(originals, optimized, platforms):
+    """calculate_score over aligned lists / Series / Arrow arrays"""
+    originals = _as_list(originals)
+    optimized = _as_list(optimized)
+    if len(optimized) != len(originals):
+        raise ValueError(f"❌ Expected {len(originals)} optimized texts, got {len(optimized)}")
+    return [
+        calculate_score(original, opt, platform)
+        for original, opt, platform in zip(originals, optimized, _broadcast(platforms, len(originals)))
+    ]
 
 # ===============================
 # MAIN
 # ===============================
 if __name__ == "__main__":
-    ws = connect_sheet()
+    store = get_storage()
+    headers, data_rows = store.read_table(WORKSHEET_NAME)
 
-    rows = ws.get_all_values()
-    headers = rows[0]
-    data_rows = rows[1:]
-
-    # 🔒 REQUIRED COLUMNS
-    REQUIRED_COLUMNS = [
-        "Generated_Content",
-        "Optimized_Content",
-        "Optimization_Score",
-    ]
-
-    for col in REQUIRED_COLUMNS:
-        if col not in headers:
-            ws.update_cell(1, len(headers) + 1, col)
-            headers.append(col)
-
-    gen_col = headers.index("Generated_Content") + 1
-    opt_col = headers.index("Optimized_Content") + 1
-    score_col = headers.index("Optimization_Score") + 1
+    if not headers:
+        print(f"❌ {WORKSHEET_NAME} is empty")
+        exit()
 
+    full_run = is_full_run()
     optimized_count = 0
+    skipped = 0
 
+    # 🔒 Output columns are created by update_cells if missing
+    updates = {col: {} for col in OUTPUT_COLUMNS}
+
+    pending = []  # (row number, original, platform, hash)
     for idx, row in enumerate(data_rows, start=2):
         row_dict = dict(zip(headers, row))
 
@@ -168,15 +176,32 @@ if __name__ == "__main__":
         if not original:
             continue
 
-        optimized = optimize_content(original, platform)
-        score = calculate_score(original, optimized, platform)
+        row_hash = content_hash(original, platform, version=RULES_VERSION)
+        if not full_run and is_unchanged(
+            row_dict, "Optimization_Hash", row_hash,
+            ["Optimized_Content", "Optimization_Score"]
+        ):
+            skipped += 1
+            continue
 
-        # ✅ FIXED UPDATE (2D LIST REQUIRED)
-        ws.update(f"{chr(64 + opt_col)}{idx}", [[optimized]])
-        ws.update(f"{chr(64 + score_col)}{idx}", [[score]])
+        pending.append((idx, original, platform, row_hash))
+
+    rows, originals, platforms, hashes = zip(*pending) if pending else ((), (), (), ())
+    optimized_texts = optimize_many(originals, platforms)
+    scores = score_many(originals, optimized_texts, platforms)
+
+    for idx, optimized, score, row_hash in zip(rows, optimized_texts, scores, hashes):
+        updates["Optimized_Content"][idx] = optimized
+        updates["Optimization_Score"][idx] = score
+        updates["Optimization_Hash"][idx] = row_hash
 
         optimized_count += 1
         print(f"✅ Optimized row {idx} | Score: {score}")
 
-    send_slack(optimized_count)
-    print(f"\n🎉 Optimization finished: {optimized_count} rows updated")
+    # ✅ BATCHED WRITE-BACK (one range per column run)
+    calls = store.update_cells(WORKSHEET_NAME, updates)
+    store.flush()
+    print(f"📤 Wrote {optimized_count} rows in {calls} batch request(s)")
+
+    notify(f"✅ Content Optimization Completed\nOptimized Rows: {optimized_count}")
+    print(f"\n🎉 Optimization finished: {optimized_count} rows updated, {skipped} unchanged")
@@ -0,0 +1,125 @@
+"""
+Cross-Run Dedup Index
+---------------------
+- Persistent set of collected posts keyed by (platform, post_id)
+- Backed by SQLite (DEDUP_INDEX_PATH); survives between runs
+- Optional in-memory Bloom filter in front (DEDUP_BLOOM_CAPACITY, 0 = off):
+  ids it has never seen skip the SQLite lookup entirely
+- Collectors ask unseen() before expensive follow-up calls and seen()
+  before writing; add() marks a post, commit() makes it durable once
+  the post has actually been written
+"""
+
+import os
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEDUP_INDEX_PATH = os.getenv("DEDUP_INDEX_PATH", "seen_posts.db")
+DEDUP_BLOOM_CAPACITY = int(os.getenv("DEDUP_BLOOM_CAPACITY", "1000000"))
+DEDUP_BLOOM_ERROR_RATE = float(os.getenv("DEDUP_BLOOM_ERROR_RATE", "0.01"))
+
+LOOKUP_BATCH = 500  # ids per SELECT ... IN (...)
+
+def _key(platform, post_id):
+    return f"{platform}\x1f{post_id}"
+
+class BloomFilter:
+    """Bit-array Bloom filter with double hashing over one blake2b digest"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+class DedupIndex:
+    def __init__(self, path=DEDUP_INDEX_PATH, bloom_capacity=DEDUP_BLOOM_CAPACITY,
+                 bloom_error_rate=DEDUP_BLOOM_ERROR_RATE):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen (
+                platform TEXT NOT NULL,
+                post_id TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                PRIMARY KEY (platform, post_id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+        self.bloom = None
+        if bloom_capacity > 0:
+            self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+            for platform, post_id in self.conn.execute("SELECT platform, post_id FROM seen"):
+                self.bloom.add(_key(platform, post_id))
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def seen(self, platform, post_id):
+        post_id = str(post_id)
+        if self.bloom is not None and _key(platform, post_id) not in self.bloom:
+            return False
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM seen WHERE platform = ? AND post_id = ?", (platform, post_id)
+            ).fetchone() is not None
+
+    def unseen(self, platform, post_ids):
+        """The ids (in order) not in the index yet"""
+        post_ids = [str(p) for p in post_ids]
+        candidates = post_ids
+        if self.bloom is not None:
+            candidates = [p for p in post_ids if _key(platform, p) in self.bloom]
+
+        known = set()
+        with self._lock:
+            for i in range(0, len(candidates), LOOKUP_BATCH):
+                batch = candidates[i:i + LOOKUP_BATCH]
+                placeholders = ", ".join("?" * len(batch))
+                known.update(row[0] for row in self.conn.execute(
+                    f"SELECT post_id FROM seen WHERE platform = ? AND post_id IN ({placeholders})",
+                    [platform] + batch,
+                ))
+        return [p for p in post_ids if p not in known]
+
+    def add(self, platform, post_id):
+        """Marks a post; durable after commit()"""
+        post_id = str(post_id)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO seen VALUES (?, ?, ?)", (platform, post_id, time.time())
+            )
+        if self.bloom is not None:
+            self.bloom.add(_key(platform, post_id))
+
+    def commit(self):
+        with self._lock:
+            self.conn.commit()
+
+    def rollback(self):
+        with self._lock:
+            self.conn.rollback()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
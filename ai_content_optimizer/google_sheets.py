@@ -1,9 +1,9 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime
 import os
 from gspread.exceptions import WorksheetNotFound
 
+from sheets_client import get_worksheet
+
 # ================================
 # CONFIG
 # ================================
@@ -20,24 +20,13 @@ def save_to_google_sheet(topic, platform, content):
     if not os.path.exists(SERVICE_ACCOUNT_FILE):
         raise FileNotFoundError("❌ credentials.json not found")
 
-    scope = ["https://www.googleapis.com/auth/spreadsheets"]
-
-    credentials = ServiceAccountCredentials.from_json_keyfile_name(
-        SERVICE_ACCOUNT_FILE, scope
-    )
-
-    client = gspread.authorize(credentials)
-
-    spreadsheet = client.open_by_key(SPREADSHEET_ID)
-
-    # ✅ Get worksheet or create it
+    # ✅ Get worksheet or create it (shared, cached client)
     try:
-        worksheet = spreadsheet.worksheet(WORKSHEET_NAME)
+        worksheet = get_worksheet(WORKSHEET_NAME, SPREADSHEET_ID, SERVICE_ACCOUNT_FILE)
     except WorksheetNotFound:
-        worksheet = spreadsheet.add_worksheet(
-            title=WORKSHEET_NAME,
-            rows="1000",
-            cols="10"
+        worksheet = get_worksheet(
+            WORKSHEET_NAME, SPREADSHEET_ID, SERVICE_ACCOUNT_FILE,
+            create=True, rows="1000", cols="10"
         )
         # Add header row once
         worksheet.append_row([
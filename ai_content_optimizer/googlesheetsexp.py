@@ -1,7 +1,11 @@
-# --- Import Google API and pandas ---
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-import pandas as pd
+# --- Import Google API ---
+from sheets_quota import execute
+from transport import sheets_service
+from sheets_io import APPEND_CHUNK_ROWS, MAX_CHARS_PER_REQUEST
+from concurrent.futures import ThreadPoolExecutor
+import time
+import csv
+import math
 import os
 
 # --- Google Sheet details ---
@@ -9,49 +13,213 @@ SPREADSHEET_ID = "1jI2vj3Gwhzgp76ERdB9Sou8JaqpnIpcIBV2oqldh-6M"
 
 CREDENTIALS_FILE = "credentials.json"  # path to your service account key
 
-# --- Function to upload CSV to Google Sheet ---
-def upload_csv(csv_path, sheet_name="Sheet1"):
-    # --- Check if CSV exists ---
-    if not os.path.exists(csv_path):
-        print(f" File not found: {csv_path}")
-        return
-
-    # --- Authorize Google Sheets ---
-    creds = service_account.Credentials.from_service_account_file(
-        CREDENTIALS_FILE, scopes=["https://www.googleapis.com/auth/spreadsheets"]
-    )
-    service = build("sheets", "v4", credentials=creds)
-
-    # --- Check if sheet (tab) exists ---
-    metadata = service.spreadsheets().get(spreadsheetId=SPREADSHEET_ID).execute()
-    sheet_names = [s["properties"]["title"] for s in metadata["sheets"]]
-
-    # --- Create sheet if missing ---
-    if sheet_name not in sheet_names:
-        service.spreadsheets().batchUpdate(
+# Tabs uploaded at once; every request still waits for a Sheets quota token
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+
+# --- Shared credentials, one API client per worker thread (httplib2 is not thread-safe) ---
+def get_service():
+    return sheets_service(CREDENTIALS_FILE)
+
+# --- Numbers go up as numbers, one type per column (as pandas.read_csv sent them) ---
+def _as_int(value):
+    if "_" in value:
+        raise ValueError(value)
+    return int(value)
+
+def _as_float(value):
+    if "_" in value:
+        raise ValueError(value)
+    number = float(value)
+    if not math.isfinite(number):  # JSON has no NaN / inf
+        raise ValueError(value)
+    return number
+
+def scan_csv(csv_path):
+    """
+    One pass over the CSV. Returns (rows incl. header, columns, converters).
+    Like pandas.read_csv, a column is int when every filled cell is an
+    int, float when every filled cell is a number (an int column with
+    gaps becomes float) and text otherwise; converters[i] is None for text.
+    """
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return 0, 0, []
+
+        rows = 1
+        can_int, can_float = [True] * len(header), [True] * len(header)
+        has_empty, filled = [False] * len(header), [False] * len(header)
+        for row in reader:
+            rows += 1
+            if len(row) > len(can_int):
+                grow = len(row) - len(can_int)
+                can_int += [True] * grow
+                can_float += [True] * grow
+                has_empty += [rows > 2] * grow  # cells missing from earlier rows
+                filled += [False] * grow
+            for i, value in enumerate(row):
+                if value == "":
+                    has_empty[i] = True
+                    continue
+                filled[i] = True
+                if can_int[i]:
+                    try:
+                        _as_int(value)
+                        continue
+                    except ValueError:
+                        can_int[i] = False
+                if can_float[i]:
+                    try:
+                        _as_float(value)
+                    except ValueError:
+                        can_float[i] = False
+            for i in range(len(row), len(can_int)):
+                has_empty[i] = True
+
+    converters = []
+    for i in range(len(can_int)):
+        if not filled[i] or not can_float[i]:
+            converters.append(None)
+        elif can_int[i] and not has_empty[i]:
+            converters.append(int)
+        else:
+            converters.append(float)
+    return rows, len(converters), converters
+
+def _convert(row, converters):
+    return [
+        value if i >= len(converters) or converters[i] is None or value == "" else converters[i](value)
+        for i, value in enumerate(row)
+    ]
+
+def iter_csv_chunks(csv_path, chunk_rows=APPEND_CHUNK_ROWS, max_chars=MAX_CHARS_PER_REQUEST, converters=None):
+    """
+    Yields (first row number, rows) blocks of at most chunk_rows rows and
+    about max_chars characters; the header row is row 1.
+    converters: per-column types from scan_csv() (scanned here when None)
+    """
+    if converters is None:
+        converters = scan_csv(csv_path)[2]
+
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        start, chunk, size = 1, [header], 0
+        for row in reader:
+            chunk.append(_convert(row, converters))
+            size += sum(len(v) for v in row)
+            if len(chunk) == chunk_rows or size >= max_chars:
+                yield start, chunk
+                start, chunk, size = start + len(chunk), [], 0
+        if chunk:
+            yield start, chunk
+
+# --- Create every missing tab and grow every short one: one metadata read + one batchUpdate ---
+# values.update past the grid fails ("exceeds grid limits"); a new tab has 1000 rows x 26 columns
+DEFAULT_GRID = (1000, 26)
+
+def ensure_tabs(titles, sizes=None):
+    """sizes: {title: (rows, columns)} the tab must hold"""
+    sizes = sizes or {}
+    service = get_service()
+    metadata = execute(service.spreadsheets().get(
+        spreadsheetId=SPREADSHEET_ID, fields="sheets.properties(title,sheetId,gridProperties)"
+    ), "read")
+    existing = {s["properties"]["title"]: s["properties"] for s in metadata["sheets"]}
+
+    requests, missing = [], []
+    for title in dict.fromkeys(titles):
+        rows, cols = sizes.get(title, (0, 0))
+        if title not in existing:
+            missing.append(title)
+            requests.append({"addSheet": {"properties": {"title": title, "gridProperties": {
+                "rowCount": max(rows, DEFAULT_GRID[0]), "columnCount": max(cols, DEFAULT_GRID[1]),
+            }}}})
+            continue
+
+        props = existing[title]
+        grid = props.get("gridProperties", {})
+        for dimension, needed, current in (("ROWS", rows, grid.get("rowCount", 0)),
+                                           ("COLUMNS", cols, grid.get("columnCount", 0))):
+            if needed > current:
+                requests.append({"appendDimension": {
+                    "sheetId": props["sheetId"], "dimension": dimension, "length": needed - current,
+                }})
+
+    if requests:
+        execute(service.spreadsheets().batchUpdate(
+            spreadsheetId=SPREADSHEET_ID, body={"requests": requests}
+        ))
+    if missing:
+        print(f" Created new tabs: {', '.join(missing)}")
+    return missing
+
+# --- Stream one CSV up in row blocks (never held in memory at once) ---
+def upload_tab(csv_path, sheet_name, converters=None):
+    service = get_service()
+    started = time.perf_counter()
+    rows = 0
+    for start, chunk in iter_csv_chunks(csv_path, converters=converters):
+        execute(service.spreadsheets().values().update(
             spreadsheetId=SPREADSHEET_ID,
-            body={"requests": [{"addSheet": {"properties": {"title": sheet_name}}}]}
-        ).execute()
-        print(f" Created new tab: {sheet_name}")
+            range=f"{sheet_name}!A{start}",
+            valueInputOption="RAW",
+            body={"values": chunk}
+        ))
+        rows += len(chunk)
+
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed else 0.0
+    print(f" Uploaded '{csv_path}' to tab '{sheet_name}': {rows} rows in {elapsed:.1f}s ({rate:.0f} rows/s)")
+    return {"tab": sheet_name, "rows": rows, "seconds": round(elapsed, 2), "rows_per_sec": round(rate, 1)}
+
+# --- Upload several CSVs, tabs in parallel ---
+def upload_csvs(jobs, max_workers=UPLOAD_WORKERS):
+    """jobs: [(csv_path, sheet_name)]. Returns one stats dict per uploaded tab."""
+    present = []
+    for csv_path, sheet_name in jobs:
+        if os.path.exists(csv_path):
+            present.append((csv_path, sheet_name))
+        else:
+            print(f" File not found: {csv_path}")
+    if not present:
+        return []
 
-    # --- Read CSV and clean data ---
-    df = pd.read_csv(csv_path)
-    df = df.fillna('')  
-    data = [df.columns.tolist()] + df.values.tolist()
+    # Scan first: the grid must fit every row before the first write
+    scans = [scan_csv(path) for path, _ in present]
+    sizes = {}
+    for (_, sheet_name), (rows, cols, _) in zip(present, scans):
+        old_rows, old_cols = sizes.get(sheet_name, (0, 0))
+        sizes[sheet_name] = (max(rows, old_rows), max(cols, old_cols))
+    ensure_tabs([sheet_name for _, sheet_name in present], sizes)
 
-    # --- Upload data to the Google Sheet ---
-    service.spreadsheets().values().update(
-        spreadsheetId=SPREADSHEET_ID,
-        range=f"{sheet_name}!A1",
-        valueInputOption="RAW",
-        body={"values": data}
-    ).execute()
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(upload_tab, path, name, converters)
+            for (path, name), (_, _, converters) in zip(present, scans)
+        ]
+        for (csv_path, sheet_name), future in zip(present, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f" Upload of '{csv_path}' to tab '{sheet_name}' failed: {e}")
+    return results
 
-    print(f" Uploaded '{csv_path}' to tab '{sheet_name}'")
+# --- Function to upload CSV to Google Sheet ---
+def upload_csv(csv_path, sheet_name="Sheet1"):
+    results = upload_csvs([(csv_path, sheet_name)])
+    return results[0] if results else None
 
 # --- Run uploader for all platforms ---
 if __name__ == "__main__":
-    upload_csv("sample_data_twitter.csv", "twitter")  
-    upload_csv("sample_data_reddit.csv", "reddit")  
-    upload_csv("sample_data_youtube.csv", "youtube")
-    upload_csv("sample_data_instagram.csv", "instagram") 
+    upload_csvs([
+        ("sample_data_twitter.csv", "twitter"),
+        ("sample_data_reddit.csv", "reddit"),
+        ("sample_data_youtube.csv", "youtube"),
+        ("sample_data_instagram.csv", "instagram"),
+    ])
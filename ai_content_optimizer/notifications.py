@@ -0,0 +1,174 @@
+"""
+Slack Notification Dispatcher
+-----------------------------
+- notify() only enqueues: pipeline stages never wait on Slack
+- One background worker posts over a pooled keep-alive session
+  (every request has a timeout)
+- Bursts are coalesced: messages arriving within SLACK_DIGEST_SECONDS
+  of the first one go out as a single digest, repeats collapsed
+  (a short CLI run therefore sends one digest)
+- Pending messages are flushed on interpreter shutdown
+"""
+
+import os
+import time
+import queue
+import atexit
+import threading
+import requests
+from dotenv import load_dotenv
+
+from transport import get_session
+
+load_dotenv()
+
+SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
+SLACK_TIMEOUT = float(os.getenv("SLACK_TIMEOUT", "5"))
+SLACK_DIGEST_SECONDS = float(os.getenv("SLACK_DIGEST_SECONDS", "30"))
+SLACK_MAX_RETRIES = int(os.getenv("SLACK_MAX_RETRIES", "2"))
+
+# Slack truncates long message text; longer digests are split
+MAX_MESSAGE_CHARS = 3500
+
+def build_digest(messages):
+    """One text from a burst of messages; identical messages collapse to one line with a count"""
+    counts = {}
+    for message in messages:
+        counts[message] = counts.get(message, 0) + 1
+
+    if len(counts) == 1:
+        message, n = next(iter(counts.items()))
+        return message if n == 1 else f"{message}  (×{n})"
+
+    parts = [m if n == 1 else f"{m}  (×{n})" for m, n in counts.items()]
+    return f"🧾 *Pipeline digest* ({len(messages)} updates)\n\n" + "\n\n".join(parts)
+
+def split_text(text, limit=MAX_MESSAGE_CHARS):
+    """Splits on paragraph boundaries (hard-cuts a single oversized paragraph)"""
+    chunks, current = [], ""
+    for part in text.split("\n\n"):
+        while len(part) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(part[:limit])
+            part = part[limit:]
+        candidate = f"{current}\n\n{part}" if current else part
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = part
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+class _Flush:
+    def __init__(self):
+        self.done = threading.Event()
+
+class SlackDispatcher:
+    def __init__(self, webhook_url=SLACK_WEBHOOK_URL, digest_seconds=SLACK_DIGEST_SECONDS,
+                 timeout=SLACK_TIMEOUT, max_retries=SLACK_MAX_RETRIES):
+        self.webhook_url = webhook_url
+        self.digest_seconds = digest_seconds
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.queue = queue.Queue()
+        self.sent = 0
+        self.failed = 0
+
+        self._lock = threading.Lock()
+        self._worker = None
+        self._session = None
+
+    # ---------- producer side ----------
+    def notify(self, message):
+        if not self.webhook_url or not message:
+            return
+        self._ensure_worker()
+        self.queue.put(str(message).strip())
+
+    def flush(self, timeout=None):
+        """Sends whatever is pending now; waits at most `timeout` seconds"""
+        if self._worker is None:
+            return True
+        marker = _Flush()
+        self.queue.put(marker)
+        if timeout is None:
+            timeout = self.timeout * (self.max_retries + 1) * 2
+        return marker.done.wait(timeout)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._session = get_session("slack", pool_size=2)
+            self._worker = threading.Thread(target=self._run, name="slack-dispatcher", daemon=True)
+            self._worker.start()
+            atexit.register(self.flush)
+
+    # ---------- worker side ----------
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if isinstance(item, _Flush):
+                item.done.set()
+                continue
+
+            batch, marker = [item], None
+            deadline = time.monotonic() + self.digest_seconds
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if isinstance(item, _Flush):
+                    marker = item
+                    break
+                batch.append(item)
+
+            for text in split_text(build_digest(batch)):
+                self._post(text)
+            if marker is not None:
+                marker.done.set()
+
+    def _post(self, text):
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._session.post(
+                    self.webhook_url, json={"text": text}, timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                error = e
+            else:
+                if response.status_code < 400:
+                    self.sent += 1
+                    return
+                error = f"HTTP {response.status_code}"
+                if response.status_code == 429:
+                    time.sleep(min(float(response.headers.get("Retry-After", 1)), 30))
+                    continue
+                if response.status_code < 500:
+                    break
+            if attempt < self.max_retries:
+                time.sleep(2 ** attempt)
+
+        self.failed += 1
+        print(f"⚠️ Slack notification dropped: {error}")
+
+# ===============================
+# MODULE-LEVEL DISPATCHER
+# ===============================
+_dispatcher = SlackDispatcher()
+
+def notify(message):
+    """Queues a Slack message; returns immediately"""
+    _dispatcher.notify(message)
+
+def flush(timeout=None):
+    return _dispatcher.flush(timeout)
@@ -2,7 +2,7 @@
 Milestone 3 – Module 3
 Performance Metrics Hub
 --------------------------------
-- Reads data from Content_Creation sheet
+- Reads data from Content_Creation (via storage layer)
 - Calculates sentiment, optimization & engagement metrics
 - Writes row-wise metrics history
 - Ensures headers are written ONCE
@@ -12,23 +12,18 @@ Performance Metrics Hub
 # ===============================
 # IMPORTS
 # ===============================
-import os
 import pandas as pd
-import gspread
-import requests
 from datetime import datetime
-from oauth2client.service_account import ServiceAccountCredentials
 from dotenv import load_dotenv
 
+from notifications import notify
+from storage import get_storage
+
 # ===============================
 # LOAD ENV
 # ===============================
 load_dotenv()
 
-SERVICE_ACCOUNT_FILE = os.getenv("GSPREAD_SERVICE_ACCOUNT_FILE")
-SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
-SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
-
 SOURCE_SHEET = "Content_Creation"
 METRICS_SHEET = "performance_metrics"
 
@@ -49,31 +44,6 @@ HEADERS = [
     "Total_Items",
 ]
 
-# ===============================
-# GOOGLE SHEETS CONNECTION
-# ===============================
-def connect_spreadsheet():
-    scope = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(
-        SERVICE_ACCOUNT_FILE, scope
-    )
-    client = gspread.authorize(creds)
-    return client.open_by_key(SPREADSHEET_ID)
-
-# ===============================
-# SLACK NOTIFICATION
-# ===============================
-def send_slack(message):
-    if not SLACK_WEBHOOK_URL:
-        return
-    try:
-        requests.post(SLACK_WEBHOOK_URL, json={"text": message}, timeout=5)
-    except Exception:
-        pass
-
 # ===============================
 # METRICS CALCULATION
 # ===============================
@@ -139,22 +109,22 @@ def calculate_metrics(df):
 # ===============================
 # UPLOAD METRICS (HEADERS SAFE)
 # ===============================
-def upload_metrics(sheet, metrics):
-    try:
-        try:
-            ws = sheet.worksheet(METRICS_SHEET)
-        except gspread.exceptions.WorksheetNotFound:
-            ws = sheet.add_worksheet(title=METRICS_SHEET, rows="200", cols="20")
+def upload_metrics(metrics, store=None):
+    """
+    metrics: one metrics dict, or a list of them (e.g. a backfill)
+    """
+    if isinstance(metrics, dict):
+        metrics = [metrics]
+    store = store or get_storage()
 
+    try:
         # Write headers ONLY once
-        existing_headers = ws.row_values(1)
-        if existing_headers != HEADERS:
-            ws.clear()
-            ws.append_row(HEADERS)
+        if store.read_headers(METRICS_SHEET) != HEADERS:
+            store.replace_table(METRICS_SHEET, HEADERS, [])
 
-        # Append metrics row
-        ws.append_row([metrics[h] for h in HEADERS])
-        print("✅ Performance metrics appended successfully")
+        # Append metrics rows (buffered append_rows on Sheets)
+        store.append_rows(METRICS_SHEET, [[m[h] for h in HEADERS] for m in metrics])
+        print(f"✅ Performance metrics appended successfully ({len(metrics)} row(s))")
 
     except Exception as e:
         print("❌ Failed to upload metrics:", e)
@@ -165,18 +135,17 @@ def upload_metrics(sheet, metrics):
 if __name__ == "__main__":
     print("📊 Running Performance Metrics Hub...\n")
 
-    sheet = connect_spreadsheet()
-    source_ws = sheet.worksheet(SOURCE_SHEET)
-    df = pd.DataFrame(source_ws.get_all_records())
+    store = get_storage()
+    df = pd.DataFrame(store.read_records(SOURCE_SHEET))
 
     if df.empty:
         print("⚠️ No data found in Content_Creation sheet")
         exit()
 
     metrics = calculate_metrics(df)
-    upload_metrics(sheet, metrics)
+    upload_metrics(metrics, store)
 
-    send_slack(
+    notify(
         f"📈 Performance Metrics Updated\n"
         f"Total Items: {metrics['Total_Items']}\n"
         f"Avg Sentiment: {metrics['Avg_Sentiment']}\n"
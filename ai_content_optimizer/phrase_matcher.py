@@ -0,0 +1,97 @@
+"""
+Compiled Phrase Matcher
+-----------------------
+- Every keyword rule of the scorers lives in RULE_GROUPS
+- Phrases match whole words ("ai" no longer matches inside "said");
+  a trailing "*" allows suffixes ("comment*" -> comments, commented)
+- "_" separates words, as it did for the old substring rules:
+  "#ai_tools" and "#growth_hacks" still hit "ai" / "growth"
+- Multi-word phrases accept any whitespace between the words
+- Each phrase is first looked up as a plain substring (its longest
+  word); only texts that contain it run the phrase's own literal-first
+  pattern, which checks the word boundaries where the literal occurs
+- Groups are evaluated on demand (hit()), stopping at the first phrase
+  that matches: a scorer pays only for the groups it reads
+"""
+
+import re
+
+# Letters and digits only: "_" separates words, so "#ai_tools" matches "ai"
+_WORD_CHAR = r"[^\W_]"
+
+def _phrase_pattern(phrase):
+    """
+    Literal first, boundary check after it: `comment(?<![^\\W_]comment)` finds
+    "comment" not preceded by a letter or digit, like (?<![^\\W_])comment,
+    but keeps the literal prefix re uses for its fast search
+    """
+    prefix = phrase.endswith("*")
+    words = phrase.rstrip("*").split()
+    first = re.escape(words[0])
+    body = rf"{first}(?<!{_WORD_CHAR}{first})" + "".join(rf"\s+{re.escape(w)}" for w in words[1:])
+    return body if prefix else body + rf"(?!{_WORD_CHAR})"
+
+class PhraseMatcher:
+    def __init__(self, groups):
+        """groups: {group name: [phrases]}; a phrase may belong to several groups"""
+        self.groups = {}
+        self._compiled = {}
+        for group, phrases in groups.items():
+            entries = []
+            for phrase in phrases:
+                phrase = " ".join(phrase.lower().split())
+                if phrase not in self._compiled:
+                    literal = max(phrase.rstrip("*").split(), key=len)
+                    self._compiled[phrase] = (literal, re.compile(_phrase_pattern(phrase)))
+                literal, pattern = self._compiled[phrase]
+                entries.append((phrase, literal, pattern.search))
+            self.groups[group] = tuple(entries)
+
+    def patterns(self, group):
+        """[(phrase, literal, compiled pattern)] of `group`, for callers matching many texts at once"""
+        return [(phrase,) + self._compiled[phrase] for phrase, _, _ in self.groups.get(group, ())]
+
+    def hit(self, text, group, lowered=False):
+        """True when any phrase of `group` occurs in `text` (lowered=True: already lowercase); unknown groups never hit"""
+        if not lowered:
+            text = text.lower()
+        for _, literal, search in self.groups.get(group, ()):
+            if literal in text and search(text):
+                return True
+        return False
+
+    def match(self, text):
+        """{group: set of phrases hit} for every group with at least one hit"""
+        lowered = text.lower()
+        hits = {}
+        for group, entries in self.groups.items():
+            found = {phrase for phrase, literal, search in entries if literal in lowered and search(lowered)}
+            if found:
+                hits[group] = found
+        return hits
+
+    def groups_hit(self, text):
+        """frozenset of the group names with at least one hit"""
+        lowered = text.lower()
+        return frozenset(group for group in self.groups if self.hit(lowered, group, lowered=True))
+
+# ===============================
+# SCORING RULES
+# ===============================
+RULE_GROUPS = {
+    # content_optimization.calculate_score, ab_testing.score_content
+    "engagement": ["reply*", "comment*", "subscribe*", "discuss*"],
+    # content_optimization.calculate_score: the platform's own CTA word
+    "cta:twitter": ["reply*"],
+    "cta:youtube": ["subscribe*"],
+    "cta:reddit": ["discuss*"],
+    "cta:linkedin": ["comment*"],
+    # ab_testing.score_content
+    "trending": ["ai", "growth", "smart*", "boost*"],
+    # prediction_coach.platform_modifier
+    "instagram_tone": ["love*", "fun", "amazing"],
+    "linkedin_topics": ["growth", "strategy", "data"],
+    "youtube_howto": ["how to", "guide*", "tutorial*"],
+}
+
+RULES = PhraseMatcher(RULE_GROUPS)
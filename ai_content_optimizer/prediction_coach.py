@@ -2,10 +2,13 @@
 Milestone 3 – Module 4
 Prediction Coach (No Streamlit)
 --------------------------------
-- Reads A/B testing results from Google Sheets
+- Reads A/B testing results (via storage layer)
 - Predicts best platform & posting time
-- Calculates viral potential score (0–1)
-- Writes recommendations to Prediction_Coach sheet
+- Calculates viral potential score (0–1) for all rows × platforms
+  in one vectorized pass: a feature table (word count, '#', '!',
+  keyword groups) built once, platform modifiers as NumPy array
+  expressions over it (identical to the row-by-row rules)
+- Writes recommendations to Prediction_Coach tab
 - Sends Slack notification
 """
 
@@ -13,59 +16,34 @@ Prediction Coach (No Streamlit)
 # IMPORTS
 # ===============================
 import os
-import json
-import gspread
-import requests
+import re
 from datetime import datetime
+import numpy as np
 import pandas as pd
-from oauth2client.service_account import ServiceAccountCredentials
 from dotenv import load_dotenv
 
+from notifications import notify
+from storage import get_storage
+from phrase_matcher import RULES
+from text_features import text_features
+
 # ===============================
 # LOAD ENV
 # ===============================
 load_dotenv()
 
-SERVICE_ACCOUNT_FILE = os.getenv("GSPREAD_SERVICE_ACCOUNT_FILE")
-SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
-SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
-
 SOURCE_TAB = "AB_Testing"
 OUTPUT_TAB = "Prediction_Coach"
 
 PLATFORMS = ["Twitter", "Instagram", "LinkedIn", "YouTube"]
 
-# ===============================
-# GOOGLE SHEETS CONNECTION
-# ===============================
-def connect_sheet():
-    scope = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(
-        SERVICE_ACCOUNT_FILE, scope
-    )
-    client = gspread.authorize(creds)
-    return client.open_by_key(SPREADSHEET_ID)
-
-# ===============================
-# SLACK
-# ===============================
-def send_slack(msg):
-    if not SLACK_WEBHOOK_URL:
-        return
-    try:
-        requests.post(SLACK_WEBHOOK_URL, json={"text": msg}, timeout=5)
-    except Exception:
-        pass
-
 # ===============================
 # VIRAL PREDICTION LOGIC
 # ===============================
 def platform_modifier(text, platform):
-    text = (text or "").lower()
-    length = len(text.split())
+    text = text or ""
+    features = text_features(text)
+    length = features.word_count
     score = 0.0
 
     if platform == "Twitter":
@@ -76,15 +54,15 @@ def platform_modifier(text, platform):
     elif platform == "Instagram":
         if 8 <= length <= 60: score += 0.07
         if "#" in text: score += 0.07
-        if any(w in text for w in ["love", "fun", "amazing"]): score += 0.04
+        if features.hit("instagram_tone"): score += 0.04
 
     elif platform == "LinkedIn":
         if length >= 20: score += 0.08
-        if any(w in text for w in ["growth", "strategy", "data"]): score += 0.06
+        if features.hit("linkedin_topics"): score += 0.06
 
     elif platform == "YouTube":
         if length >= 40: score += 0.07
-        if any(w in text for w in ["how to", "guide", "tutorial"]): score += 0.05
+        if features.hit("youtube_howto"): score += 0.05
 
     return round(score, 3)
 
@@ -106,62 +84,193 @@ def predict_viral_score(base_score, text):
     best_platform = max(results, key=results.get)
     return best_platform, results[best_platform]
 
+# ===============================
+# VECTORIZED PREDICTION (rows × platforms)
+# ===============================
+# Texts are scanned COACH_BATCH_TEXTS at a time as one joined string:
+# word counts in one NumPy pass over the code points, keyword groups in
+# one regex scan per phrase (matches mapped back to rows by offset)
+COACH_BATCH_TEXTS = int(os.getenv("COACH_BATCH_TEXTS", "10000"))
+
+# Keyword groups platform_modifier reads (phrase_matcher.RULE_GROUPS)
+GROUP_COLUMNS = ("instagram_tone", "linkedin_topics", "youtube_howto")
+
+# Row separators: control characters that are neither whitespace nor word characters
+_SEPARATORS = [chr(c) for c in (*range(0x00, 0x09), *range(0x0e, 0x1c))]
+
+# str.split() whitespace (none above U+3000); the last entry stands for every higher code point
+_SPACE = np.array([chr(c).isspace() for c in range(0x3001)] + [False])
+
+def _code_points(joined):
+    return np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+
+def _row_of(offsets, separators):
+    """Row number of each character offset in a joined string"""
+    return np.searchsorted(separators, offsets)
+
+def _word_counts(chars, separators, rows):
+    """len(text.split()) for every row of the joined code points"""
+    if not len(chars):
+        return np.zeros(rows, dtype=np.int64)
+    boundary = np.take(_SPACE, chars, mode="clip")
+    boundary[separators] = True
+    # Words started so far, read off at each row end
+    started = np.cumsum(~boundary & np.concatenate(([True], boundary[:-1])))
+    return np.diff(np.append(started[separators], started[-1]), prepend=0)
+
+def _group_hits(lowered, separator, separators, rows, group):
+    """RULES.hit for every row of the joined, lowercased texts"""
+    found = np.zeros(rows, dtype=bool)
+    for _, literal, pattern in RULES.patterns(group):
+        if literal in lowered:
+            # A match swallows the rest of its row: one match per row at most
+            row_pattern = re.compile(f"(?:{pattern.pattern})[^{re.escape(separator)}]*")
+            offsets = np.fromiter(map(re.Match.start, row_pattern.finditer(lowered)), dtype=np.int64)
+            found[_row_of(offsets, separators)] = True
+    return found
+
+def _batch_features(text):
+    """modifier_features for one chunk (a Series of str)"""
+    values = text.tolist()
+    for separator in _SEPARATORS:
+        joined = separator.join(values)
+        if joined.count(separator) == len(values) - 1:
+            break
+    else:
+        # Every separator occurs in the texts: per-row fallback
+        return pd.DataFrame({
+            "word_count": [text_features(t).word_count for t in text],
+            **{group: [text_features(t).hit(group) for t in text] for group in GROUP_COLUMNS},
+        }, index=text.index)
+
+    chars = _code_points(joined)
+    separators = np.flatnonzero(chars == ord(separator))
+
+    lowered = joined.lower()
+    low_separators = separators if len(lowered) == len(joined) else np.flatnonzero(
+        _code_points(lowered) == ord(separator)
+    )
+
+    features = pd.DataFrame({"word_count": _word_counts(chars, separators, len(text))}, index=text.index)
+    for group in GROUP_COLUMNS:
+        features[group] = _group_hits(lowered, separator, low_separators, len(text), group)
+    return features
+
+def modifier_features(texts):
+    """
+    The columns platform_modifier reads, for all texts at once:
+    word_count, has_hash, has_bang and one column per keyword group
+    """
+    text = pd.Series([t or "" for t in texts], dtype=object).astype(str)
+    chunks = [
+        _batch_features(text.iloc[start:start + COACH_BATCH_TEXTS])
+        for start in range(0, len(text), COACH_BATCH_TEXTS)
+    ]
+    features = pd.concat(chunks) if chunks else pd.DataFrame(
+        {"word_count": [], **{group: [] for group in GROUP_COLUMNS}}
+    )
+    features["has_hash"] = text.str.contains("#", regex=False)
+    features["has_bang"] = text.str.contains("!", regex=False)
+    return features
+
+def _add(*terms):
+    """Sum of (condition, value) terms, added in platform_modifier's order"""
+    score = 0.0
+    for condition, value in terms:
+        score = score + np.where(condition, value, 0.0)
+    return score
+
+def modifier_matrix(texts):
+    """len(texts) × len(PLATFORMS) array of platform_modifier values, as array expressions"""
+    f = modifier_features(texts)
+    length = f["word_count"].to_numpy()
+    has_hash, has_bang = f["has_hash"].to_numpy(), f["has_bang"].to_numpy()
+
+    modifiers = {
+        "Twitter": _add((length <= 30, 0.08), (has_hash, 0.05), (has_bang, 0.02)),
+        "Instagram": _add(((length >= 8) & (length <= 60), 0.07), (has_hash, 0.07),
+                          (f["instagram_tone"].to_numpy(), 0.04)),
+        "LinkedIn": _add((length >= 20, 0.08), (f["linkedin_topics"].to_numpy(), 0.06)),
+        "YouTube": _add((length >= 40, 0.07), (f["youtube_howto"].to_numpy(), 0.05)),
+    }
+    return _round3(np.column_stack([modifiers[p] for p in PLATFORMS]))
+
+def _round3(values):
+    """
+    Python's round(v, 3) elementwise. np.round picks the same thousandth
+    except right next to a .0005 tie, so only those go through round()
+    """
+    scaled = values * 1000.0
+    rounded = np.round(scaled) / 1000.0
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    rounded[near_tie] = [round(float(v), 3) for v in values[near_tie]]
+    return rounded
+
+def predict_viral_many(base_scores, texts):
+    """
+    predict_viral_score over aligned sequences, in one pass:
+    returns (best platforms, viral scores) as object arrays holding
+    exactly what predict_viral_score returns row by row
+    """
+    base = np.fromiter((float(b) for b in base_scores), dtype=np.float64, count=len(texts))
+    viral = 0.7 * base[:, None] + 0.3 * modifier_matrix(texts)
+
+    # min(max(v, 0), 1) yields the ints 0 / 1 when clamping
+    low, high = viral < 0, viral > 1
+    viral = _round3(np.where(low, 0.0, np.where(high, 1.0, viral)))
+
+    # argmax keeps the first maximum, like max() over PLATFORMS
+    best = viral.argmax(axis=1)
+    rows = np.arange(len(best))
+    clamped = low[rows, best] | high[rows, best]
+
+    scores = np.empty(len(best), dtype=object)
+    scores[:] = [int(v) if c else float(v) for v, c in zip(viral[rows, best], clamped)]
+    return np.array(PLATFORMS, dtype=object)[best], scores
+
+def _column(df, name, default):
+    return df[name].tolist() if name in df else [default] * len(df)
+
 # ===============================
 # MAIN ENGINE
 # ===============================
 def run_prediction_coach():
     print("🔮 Running Prediction Coach...\n")
 
-    sheet = connect_sheet()
-    ws_ab = sheet.worksheet(SOURCE_TAB)
-    df = pd.DataFrame(ws_ab.get_all_records())
+    store = get_storage()
+    df = pd.DataFrame(store.read_records(SOURCE_TAB))
 
     if df.empty:
         print("⚠️ No A/B testing data found.")
         return
 
-    results = []
-
-    for idx, row in df.iterrows():
-        text_a = row.get("Variant_A", "")
-        text_b = row.get("Variant_B", "")
-        score_a = float(row.get("Score_A", 0))
-        score_b = float(row.get("Score_B", 0))
-
-        plat_a, viral_a = predict_viral_score(score_a, text_a)
-        plat_b, viral_b = predict_viral_score(score_b, text_b)
-
-        if viral_a >= viral_b:
-            winner = "Variant A"
-            final_text = text_a
-            platform = plat_a
-            viral_score = viral_a
-        else:
-            winner = "Variant B"
-            final_text = text_b
-            platform = plat_b
-            viral_score = viral_b
-
-        results.append([
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            winner,
-            platform,
-            viral_score,
-            best_posting_time(platform),
-            final_text,
-        ])
-
-        print(f"✅ Row {idx+1}: {winner} → {platform} ({viral_score})")
+    text_a = _column(df, "Variant_A", "")
+    text_b = _column(df, "Variant_B", "")
+
+    plat_a, viral_a = predict_viral_many(_column(df, "Score_A", 0), text_a)
+    plat_b, viral_b = predict_viral_many(_column(df, "Score_B", 0), text_b)
+
+    a_wins = (viral_a >= viral_b).astype(bool)
+    winners = np.where(a_wins, "Variant A", "Variant B")
+    platforms = np.where(a_wins, plat_a, plat_b)
+    viral_scores = np.where(a_wins, viral_a, viral_b)
+    final_texts = np.where(a_wins, np.array(text_a, dtype=object), np.array(text_b, dtype=object))
+
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    results = [
+        [timestamp, str(winner), platform, viral_score, best_posting_time(platform), final_text]
+        for winner, platform, viral_score, final_text
+        in zip(winners, platforms, viral_scores, final_texts)
+    ]
+
+    print("\n".join(
+        f"✅ Row {idx+1}: {winner} → {platform} ({viral_score})"
+        for idx, (_, winner, platform, viral_score, _, _) in zip(df.index, results)
+    ))
 
     # ===============================
-    # WRITE TO GOOGLE SHEETS
+    # WRITE RESULTS
     # ===============================
-    try:
-        ws_out = sheet.worksheet(OUTPUT_TAB)
-        ws_out.clear()
-    except gspread.exceptions.WorksheetNotFound:
-        ws_out = sheet.add_worksheet(title=OUTPUT_TAB, rows="1000", cols="10")
-
     headers = [
         "Timestamp",
         "Winning_Variant",
@@ -171,10 +280,10 @@ def run_prediction_coach():
         "Winning_Text",
     ]
 
-    ws_out.update([headers] + results)
-    print("\n✅ Prediction results saved to Google Sheets")
+    store.replace_table(OUTPUT_TAB, headers, results)
+    print(f"\n✅ Prediction results saved to {OUTPUT_TAB}")
 
-    send_slack(f"🔮 Prediction Coach completed for {len(results)} items")
+    notify(f"🔮 Prediction Coach completed for {len(results)} items")
 
 # ===============================
 # RUN
@@ -0,0 +1,69 @@
+"""
+Shared Rate Limiting
+--------------------
+- TokenBucket: thread-safe per-minute request pacing with a small burst
+- WindowLimiter: pacing from server rate-limit headers (remaining / reset)
+- Used by the Sheets quota scheduler and the API collectors
+"""
+
+import time
+import threading
+
+class TokenBucket:
+    """
+    Each acquire() reserves the next slot and sleeps until it is due,
+    so concurrent callers queue up in order at the configured rate
+    """
+
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, per_minute / 6)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+    def throttle(self):
+        """Drops any saved-up burst after the server pushed back"""
+        with self._lock:
+            self._tokens = min(self._tokens, 0)
+
+class WindowLimiter:
+    """
+    Paces calls from server-reported quota headers
+    (e.g. x-rate-limit-remaining / x-rate-limit-reset): callers go ahead
+    while the window has requests left, otherwise wait for the reset
+    """
+
+    def __init__(self):
+        self.remaining = None   # unknown until the first response
+        self.reset_at = 0.0     # epoch seconds
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.time()
+                if now >= self.reset_at:
+                    self.remaining = None
+                if self.remaining is None:
+                    return
+                if self.remaining > 0:
+                    self.remaining -= 1
+                    return
+                wait = self.reset_at - now
+            time.sleep(wait + 1)
+
+    def update(self, remaining, reset_at):
+        with self._lock:
+            self.remaining = remaining
+            self.reset_at = reset_at
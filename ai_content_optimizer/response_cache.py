@@ -0,0 +1,109 @@
+"""
+Persistent Prompt / Response Cache
+----------------------------------
+- On-disk (SQLite) cache for Gemini responses
+- Keyed on whitespace-normalized prompt + platform + model name
+- LRU eviction by entry count, plus max-age expiry
+- Hit / miss counters and the generation latency saved by hits
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_PATH = os.getenv("GENERATION_CACHE_PATH", "generation_cache.db")
+CACHE_MAX_ENTRIES = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_AGE_DAYS = float(os.getenv("GENERATION_CACHE_MAX_AGE_DAYS", "30"))
+
+# Bump when the key format changes (v2: case is no longer folded, so
+# entries a differently-cased prompt may have written are not reused)
+KEY_VERSION = "2"
+
+def normalize_prompt(prompt):
+    """Whitespace only: case can change the generated content"""
+    return re.sub(r"\s+", " ", prompt).strip()
+
+def cache_key(prompt, platform, model):
+    raw = "\x1f".join([f"v{KEY_VERSION}", normalize_prompt(prompt), platform.lower(), model or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES,
+                 max_age_days=CACHE_MAX_AGE_DAYS):
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                latency REAL NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+        )
+        self.conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT response, latency FROM responses WHERE key = ? AND created >= ?",
+                (key, now - self.max_age),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            self.saved_seconds += row[1]
+            return row[0]
+
+    def put(self, key, response, latency):
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, response, latency, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        self.conn.execute("DELETE FROM responses WHERE created < ?", (now - self.max_age,))
+        self.conn.execute(
+            """
+            DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "saved_seconds": round(self.saved_seconds, 2),
+        }
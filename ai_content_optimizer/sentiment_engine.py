@@ -0,0 +1,301 @@
+"""
+Batch Sentiment Engine
+----------------------
+- Weighted lexicon: {word: weight}, any size (load_lexicon() reads
+  VADER-style "word<TAB>weight[<TAB>...]" files with thousands of entries)
+- Negation: a negator (not, never, don't, ...) flips and damps the next
+  NEGATION_SCOPE words, up to the next punctuation mark
+- Boosters: "very", "extremely", ... scale the following word
+- Batches are tokenized a chunk of texts at a time (one findall over
+  the joined chunk) into integer token codes; negation and booster
+  windows are resolved with array scans instead of a per-token loop
+- The result is (document, feature, multiplier) triples: a sparse
+  document × feature matrix. All scores come from one NumPy sparse
+  mat-vec with the weight vector (np.bincount).
+- analyze_many() keeps the (label, clamped score) contract of
+  sentimental_analysis.analyze_sentiment
+"""
+
+import os
+import re
+import math
+from itertools import repeat
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+|[.,!?;:]")
+PUNCTUATION = frozenset(".,!?;:")
+
+# Batches: texts are joined with SEPARATOR, which tokenizes as its own token
+SEPARATOR = "\x00"
+BATCH_TOKEN_RE = re.compile(TOKEN_RE.pattern + "|" + SEPARATOR)
+BATCH_TEXTS = int(os.getenv("SENTIMENT_BATCH_TEXTS", "10000"))
+
+# Token kinds of the batch pass
+WORD, RESET, NEGATOR, BOOSTER, MAYBE_NEGATOR = range(5)
+
+NEGATORS = frozenset({
+    "not", "no", "never", "nor", "cannot", "without", "none",
+    "nobody", "nothing", "neither", "hardly",
+    # contractions typed without the apostrophe
+    "dont", "doesnt", "didnt", "isnt", "wasnt", "arent", "werent",
+    "cant", "couldnt", "wont", "wouldnt", "shouldnt", "aint",
+})
+
+BOOSTERS = {
+    "very": 1.3, "really": 1.3, "so": 1.2, "super": 1.3, "highly": 1.3,
+    "extremely": 1.5, "incredibly": 1.5, "absolutely": 1.5,
+    "slightly": 0.7, "somewhat": 0.8, "barely": 0.6,
+}
+
+NEGATION_SCOPE = 3
+NEGATION_SCALAR = -0.74  # as in VADER: "not good" is milder than "bad"
+SCORE_LIMIT = 3
+
+def load_lexicon(path):
+    """word<TAB>weight per line; '#' comments and multi-word entries are skipped"""
+    lexicon = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            parts = line.rstrip("\n").split("\t")
+            word = parts[0].strip().lower()
+            if len(parts) < 2 or " " in word:
+                continue
+            try:
+                lexicon[word] = float(parts[1])
+            except ValueError:
+                continue
+    return lexicon
+
+def _as_list(values):
+    if hasattr(values, "to_pylist"):
+        return values.to_pylist()
+    if hasattr(values, "tolist"):
+        return values.tolist()
+    return list(values)
+
+def _split_tokens(text, findall):
+    """
+    findall(text) for lowercased text, faster: a whitespace-separated
+    chunk that is all alphanumeric is exactly one \\w+ token, so only
+    the other chunks (punctuation, "_", emoji, ...) run the regex
+    """
+    tokens = []
+    append, extend = tokens.append, tokens.extend
+    for chunk in text.split():
+        if chunk.isalnum():
+            append(chunk)
+        else:
+            extend(findall(chunk))
+    return tokens
+
+def tokenize(text):
+    return _split_tokens(text.lower(), TOKEN_RE.findall)
+
+def label_for(score):
+    if score > 0:
+        return "Positive"
+    if score < 0:
+        return "Negative"
+    return "Neutral"
+
+class SentimentEngine:
+    """
+    binary=True counts each lexicon word once per text (set semantics)
+    and ignores negation / boosters; with a ±1 lexicon this reproduces
+    the original word-set scoring exactly.
+    """
+
+    def __init__(self, lexicon, negation=True, boosters=True, binary=False,
+                 negation_scope=NEGATION_SCOPE, negation_scalar=NEGATION_SCALAR):
+        self.vocab = {word: i for i, word in enumerate(lexicon)}
+        # Punctuation only ends clauses, even when the lexicon lists it
+        self._word_ids = {word: i for word, i in self.vocab.items() if word not in PUNCTUATION}
+        size = len(self.vocab)
+
+        # Features 0..V-1: plain words, V..2V-1: negated words
+        weights = np.fromiter(lexicon.values(), dtype=np.float64, count=size)
+        self.weights = np.concatenate([weights, weights * negation_scalar])
+        self._weight_list = self.weights.tolist()
+        self.size = size
+
+        self.negation = negation
+        self.boosters = BOOSTERS if boosters else {}
+        self.binary = binary
+        self.negation_scope = negation_scope
+
+        # Tokens that need the stateful pass; other texts take the fast path
+        self.triggers = frozenset(self.boosters) | (NEGATORS | {"t"} if negation else frozenset())
+        self._build_codes()
+
+    def _build_codes(self):
+        """
+        Token -> integer code for the batch pass, with per-code tables.
+        Code 0 stands for every word the engine has no use for.
+        """
+        special = set(PUNCTUATION) | set(self.boosters) | set(self.vocab) | {SEPARATOR}
+        if self.negation:
+            special |= NEGATORS | {"t"}
+
+        self._codes = {}
+        kinds, fids, binary_fids, boosts = [WORD], [-1], [-1], [1.0]
+        for token in sorted(special):
+            if token in PUNCTUATION or token == SEPARATOR:
+                kind = RESET
+            elif self.negation and token in NEGATORS:
+                kind = NEGATOR
+            elif self.negation and token == "t":
+                # "don't" tokenizes as "don", "t": resolved against the previous token
+                kind = MAYBE_NEGATOR
+            elif token in self.boosters:
+                kind = BOOSTER
+            else:
+                kind = WORD
+            self._codes[token] = len(kinds)
+            kinds.append(kind)
+            fids.append(self.vocab.get(token, -1) if kind in (WORD, MAYBE_NEGATOR) else -1)
+            binary_fids.append(self.vocab.get(token, -1))
+            boosts.append(self.boosters.get(token, 1.0) if kind == BOOSTER else 1.0)
+
+        self._kinds = np.array(kinds, dtype=np.int8)
+        self._fids = np.array(fids, dtype=np.int64)
+        self._binary_fids = np.array(binary_fids, dtype=np.int64)
+        self._boosts = np.array(boosts, dtype=np.float64)
+
+    # ---------- tokenize once ----------
+    def _features(self, tokens, doc, docs, features, multipliers):
+        vocab = self.vocab
+
+        if self.binary:
+            for fid in sorted({vocab[t] for t in tokens if t in vocab}):
+                docs.append(doc)
+                features.append(fid)
+                multipliers.append(1.0)
+            return
+
+        if self.triggers.isdisjoint(tokens):
+            word_ids = self._word_ids
+            fids = [word_ids[t] for t in tokens if t in word_ids]
+            docs.extend([doc] * len(fids))
+            features.extend(fids)
+            multipliers.extend([1.0] * len(fids))
+            return
+
+        negated, boost, prev = 0, 1.0, ""
+        for token in tokens:
+            if token in PUNCTUATION:
+                negated, boost = 0, 1.0
+            elif self.negation and (token in NEGATORS or (token == "t" and prev.endswith("n"))):
+                # "don't" tokenizes as "don", "t"
+                negated = self.negation_scope
+            elif token in self.boosters:
+                boost = self.boosters[token]
+            else:
+                fid = vocab.get(token)
+                if fid is not None:
+                    docs.append(doc)
+                    features.append(fid + self.size if negated else fid)
+                    multipliers.append(boost)
+                boost = 1.0
+                if negated:
+                    negated -= 1
+            prev = token
+
+    # ---------- tokenize a whole batch ----------
+    def _batch(self, texts):
+        """(docs, features, multipliers) of one chunk of texts, same entries and order as _features"""
+        texts = [text or "" for text in texts]
+        joined = SEPARATOR.join(texts)
+        if joined.count(SEPARATOR) != len(texts) - 1:
+            joined = SEPARATOR.join(text.replace(SEPARATOR, " ") for text in texts)
+        tokens = _split_tokens(joined.lower(), BATCH_TOKEN_RE.findall)
+
+        codes = np.fromiter(map(self._codes.get, tokens, repeat(0)), dtype=np.intp, count=len(tokens))
+        docs = np.cumsum(codes == self._codes[SEPARATOR])
+
+        if self.binary:
+            fids = self._binary_fids[codes]
+            hit = fids >= 0
+            pairs = np.unique(docs[hit] * self.size + fids[hit])
+            return pairs // max(self.size, 1), pairs % max(self.size, 1), np.ones(len(pairs))
+
+        kinds = self._kinds[codes]
+        fids = self._fids[codes]
+        for i in np.flatnonzero(kinds == MAYBE_NEGATOR):
+            if i and tokens[i - 1].endswith("n"):
+                kinds[i], fids[i] = NEGATOR, -1
+            else:
+                kinds[i] = WORD
+
+        emit = np.flatnonzero(fids >= 0)
+        features = fids[emit]
+        multipliers = np.ones(len(emit))
+        positions = np.arange(len(tokens))
+        words = kinds == WORD
+        resets = kinds == RESET
+
+        if self.boosters:
+            # Boosted: the last booster comes after the last word / reset before the word
+            last_booster = np.maximum.accumulate(np.where(kinds == BOOSTER, positions, -1))
+            last_stop = np.maximum.accumulate(np.where(words | resets, positions, -1))
+            stop_before = np.concatenate(([-1], last_stop[:-1]))[emit]
+            booster = last_booster[emit]
+            boosted = booster > stop_before
+            multipliers[boosted] = self._boosts[codes[booster[boosted]]]
+
+        if self.negation:
+            # Negated: the last negator is in the same clause, fewer than `scope` words back
+            last_negator = np.maximum.accumulate(np.where(kinds == NEGATOR, positions, -1))
+            last_reset = np.maximum.accumulate(np.where(resets, positions, -1))
+            words_seen = np.cumsum(words)
+            negator = last_negator[emit]
+            negated = negator > last_reset[emit]
+            negated[negated] = (
+                words_seen[emit[negated]] - 1 - words_seen[negator[negated]] < self.negation_scope
+            )
+            features[negated] += self.size
+
+        return docs[emit], features, multipliers
+
+    def matrix(self, texts):
+        """Sparse document × feature matrix in COO form: (docs, features, multipliers)"""
+        texts = _as_list(texts)
+        docs, features, multipliers = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)], [np.zeros(0)]
+        for start in range(0, len(texts), BATCH_TEXTS):
+            d, f, m = self._batch(texts[start:start + BATCH_TEXTS])
+            docs.append(d + start)
+            features.append(f)
+            multipliers.append(m)
+        return np.concatenate(docs), np.concatenate(features), np.concatenate(multipliers)
+
+    # ---------- score all documents at once ----------
+    def score_many(self, texts):
+        """Raw (unclamped) scores as a float array"""
+        texts = _as_list(texts)
+        docs, features, multipliers = self.matrix(texts)
+        return np.bincount(docs, weights=self.weights[features] * multipliers, minlength=len(texts))
+
+    def analyze_many(self, texts):
+        """[(label, score)] with score rounded half away from zero and clamped to ±3"""
+        raw = self.score_many(texts)
+        clamped = np.clip(np.sign(raw) * np.floor(np.abs(raw) + 0.5), -SCORE_LIMIT, SCORE_LIMIT)
+        return [(label_for(s), int(s)) for s in clamped]
+
+    # ---------- single texts (no NumPy round trip) ----------
+    def score_tokens(self, tokens):
+        """Raw score of one tokenize()d text; same sum, in the same order, as score_many"""
+        docs, features, multipliers = [], [], []
+        self._features(tokens, 0, docs, features, multipliers)
+        total = 0.0
+        for fid, multiplier in zip(features, multipliers):
+            total += self._weight_list[fid] * multiplier
+        return total
+
+    def analyze_tokens(self, tokens):
+        raw = self.score_tokens(tokens)
+        score = int(math.copysign(min(math.floor(abs(raw) + 0.5), SCORE_LIMIT), raw))
+        return label_for(score), score
+
+    def analyze(self, text):
+        return self.analyze_tokens(tokenize(text or ""))
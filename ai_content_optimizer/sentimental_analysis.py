@@ -3,9 +3,11 @@ Milestone 3 – Module 2
 Sentiment Analysis (Same Content_Creation Sheet)
 ------------------------------------------------
 - Reads Generated_Content
-- Performs rule-based sentiment analysis
-- Writes Sentiment + Sentiment_Score in SAME sheet
+- Performs lexicon-based sentiment analysis (weights, negation, boosters)
+  for all rows in one batch (sentiment_engine.py)
+- Writes Sentiment + Sentiment_Score in SAME sheet (bulk write-back)
 - Auto-creates columns if missing
+- Incremental: skips rows whose content + rules are unchanged (--full to redo all)
 - Sends Slack notification
 """
 
@@ -13,11 +15,13 @@ Sentiment Analysis (Same Content_Creation Sheet)
 # IMPORTS
 # ===============================
 import os
-import re
-import gspread
-import requests
 from dotenv import load_dotenv
-from oauth2client.service_account import ServiceAccountCredentials
+
+from notifications import notify
+from sentiment_engine import SentimentEngine, load_lexicon
+from storage import get_storage, sheets_enabled
+from text_features import text_features
+from watermarks import content_hash, is_full_run, is_unchanged
 
 # ===============================
 # LOAD ENV
@@ -27,21 +31,18 @@ load_dotenv()
 SERVICE_ACCOUNT_FILE = os.getenv("GSPREAD_SERVICE_ACCOUNT_FILE")
 SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
 WORKSHEET_NAME = "Content_Creation"   
-SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 
-if not SERVICE_ACCOUNT_FILE or not SPREADSHEET_ID:
-    raise EnvironmentError("❌ Google Sheets config missing")
+# Optional large weighted lexicon ("word<TAB>weight" per line, e.g. VADER's)
+SENTIMENT_LEXICON_PATH = os.getenv("SENTIMENT_LEXICON_PATH")
 
-# ===============================
-# CONNECT TO SHEET
-# ===============================
-def connect_sheet():
-    scope = ["https://www.googleapis.com/auth/spreadsheets"]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(
-        SERVICE_ACCOUNT_FILE, scope
-    )
-    client = gspread.authorize(creds)
-    return client.open_by_key(SPREADSHEET_ID).worksheet(WORKSHEET_NAME)
+# Bump whenever the scoring changes (lexicon edits are picked up by SCORING_VERSION)
+RULES_VERSION = "2"
+
+# Written in this order when missing from the sheet
+OUTPUT_COLUMNS = ["Sentiment_analysis", "Sentiment_Score", "Sentiment_Hash"]
+
+if sheets_enabled() and (not SERVICE_ACCOUNT_FILE or not SPREADSHEET_ID):
+    raise EnvironmentError("❌ Google Sheets config missing")
 
 # ===============================
 # SENTIMENT WORD LISTS
@@ -58,36 +59,32 @@ NEGATIVE_WORDS = {
     "slow", "difficult"
 }
 
-# ===============================
-# SENTIMENT FUNCTION
-# ===============================
-def analyze_sentiment(text):
-    text = text.lower()
-    words = set(re.findall(r"\b\w+\b", text))
-
-    pos = len(words & POSITIVE_WORDS)
-    neg = len(words & NEGATIVE_WORDS)
+LEXICON = {
+    **{w: 1.0 for w in POSITIVE_WORDS},
+    **{w: -1.0 for w in NEGATIVE_WORDS},
+}
+if SENTIMENT_LEXICON_PATH:
+    LEXICON.update(load_lexicon(SENTIMENT_LEXICON_PATH))
 
-    score = pos - neg
-    score = max(-3, min(3, score))  # clamp
+ENGINE = SentimentEngine(LEXICON)
 
-    if score > 0:
-        return "Positive", score
-    elif score < 0:
-        return "Negative", score
-    else:
-        return "Neutral", 0
+# Row watermarks cover the effective lexicon too: editing the
+# SENTIMENT_LEXICON_PATH file (or pointing it elsewhere) re-scores every row
+SCORING_VERSION = content_hash(
+    *(f"{word}\t{weight!r}" for word, weight in sorted(LEXICON.items())),
+    version=RULES_VERSION,
+)
 
 # ===============================
-# SLACK
+# SENTIMENT FUNCTIONS
 # ===============================
-def send_slack(message):
-    if not SLACK_WEBHOOK_URL:
-        return
-    try:
-        requests.post(SLACK_WEBHOOK_URL, json={"text": message}, timeout=5)
-    except Exception:
-        pass
+def analyze_many(texts):
+    """[(label, score clamped to ±3)] for a list / Series / Arrow array of texts"""
+    return ENGINE.analyze_many(texts)
+
+def analyze_sentiment(text):
+    # Single texts reuse the tokens other scorers may already have extracted
+    return ENGINE.analyze_tokens(text_features(text).tokens)
 
 # ===============================
 # MAIN
@@ -95,32 +92,23 @@ def send_slack(message):
 if __name__ == "__main__":
     print("📊 Running Sentiment Analysis on Content_Creation sheet...\n")
 
-    ws = connect_sheet()
-    rows = ws.get_all_values()
+    store = get_storage()
+    headers, data = store.read_table(WORKSHEET_NAME)
 
-    if not rows:
+    if not headers:
         print("❌ Sheet is empty")
         exit()
 
-    headers = rows[0]
-    data = rows[1:]
-
-    # -------------------------------
-    # Ensure required columns exist
-    # -------------------------------
-    REQUIRED_COLUMNS = ["Sentiment_analysis", "Sentiment_Score"]
-
-    for col in REQUIRED_COLUMNS:
-        if col not in headers:
-            ws.update_cell(1, len(headers) + 1, col)
-            headers.append(col)
-
     gen_col = headers.index("Generated_Content")
-    sent_col = headers.index("Sentiment_analysis") + 1
-    score_col = headers.index("Sentiment_Score") + 1
 
+    full_run = is_full_run()
     updated = 0
+    skipped = 0
+
+    # Output columns are created by update_cells if missing
+    updates = {col: {} for col in OUTPUT_COLUMNS}
 
+    pending = []  # (row number, content, hash)
     for idx, row in enumerate(data, start=2):
         if len(row) <= gen_col:
             continue
@@ -129,13 +117,35 @@ if __name__ == "__main__":
         if not content:
             continue
 
-        sentiment, score = analyze_sentiment(content)
+        row_hash = content_hash(content, version=SCORING_VERSION)
+        if not full_run and is_unchanged(
+            dict(zip(headers, row)), "Sentiment_Hash", row_hash,
+            ["Sentiment_analysis", "Sentiment_Score"]
+        ):
+            skipped += 1
+            continue
+
+        pending.append((idx, content, row_hash))
 
-        ws.update_cell(idx, sent_col, sentiment)
-        ws.update_cell(idx, score_col, score)
+    results = analyze_many([content for _, content, _ in pending])
+
+    for (idx, _, row_hash), (sentiment, score) in zip(pending, results):
+        updates["Sentiment_analysis"][idx] = sentiment
+        updates["Sentiment_Score"][idx] = score
+        updates["Sentiment_Hash"][idx] = row_hash
 
         updated += 1
         print(f"✅ Row {idx}: {sentiment} ({score})")
 
-    send_slack(f"📊 Sentiment Analysis completed for {updated} rows")
-    print(f"\n🎉 Sentiment analysis finished: {updated} rows updated")
+    # -------------------------------
+    # Bulk write-back (both columns per range)
+    # -------------------------------
+    calls = store.update_cells(WORKSHEET_NAME, updates)
+    store.flush()
+    print(f"📤 Wrote {updated} rows in {calls} API call(s)")
+
+    notify(
+        f"📊 Sentiment Analysis completed for {updated} rows "
+        f"({calls} write requests)"
+    )
+    print(f"\n🎉 Sentiment analysis finished: {updated} rows updated, {skipped} unchanged")
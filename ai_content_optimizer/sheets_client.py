@@ -0,0 +1,126 @@
+"""
+Shared Google Sheets Client
+---------------------------
+- Service-account credentials loaded once per key file
+- One authorized HTTP session per key file (keep-alive connection pool)
+- Cached Spreadsheet / Worksheet handles, reused across modules and
+  Streamlit reruns
+- OAuth tokens refreshed only when they expire
+- All requests paced by the quota scheduler (sheets_quota)
+"""
+
+# ===============================
+# IMPORTS
+# ===============================
+import os
+import threading
+import gspread
+from google.oauth2 import service_account
+from google.auth.transport.requests import AuthorizedSession
+from dotenv import load_dotenv
+
+from sheets_quota import QuotaAdapter
+
+# ===============================
+# LOAD ENV
+# ===============================
+load_dotenv()
+
+DEFAULT_SERVICE_ACCOUNT_FILE = os.getenv("GSPREAD_SERVICE_ACCOUNT_FILE", "credentials.json")
+DEFAULT_SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
+
+# Keep-alive connections kept open to sheets.googleapis.com
+POOL_SIZE = int(os.getenv("SHEETS_POOL_SIZE", "10"))
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+# ===============================
+# PROCESS-WIDE CACHES
+# ===============================
+_lock = threading.RLock()
+_credentials = {}    # key file -> Credentials
+_clients = {}        # key file -> gspread.Client
+_spreadsheets = {}   # (key file, spreadsheet id) -> Spreadsheet
+_worksheets = {}     # (key file, spreadsheet id, title) -> Worksheet
+
+# ===============================
+# CREDENTIALS + SESSION
+# ===============================
+def get_credentials(service_account_file=None):
+    path = service_account_file or DEFAULT_SERVICE_ACCOUNT_FILE
+    with _lock:
+        if path not in _credentials:
+            _credentials[path] = service_account.Credentials.from_service_account_file(
+                path, scopes=SCOPES
+            )
+        return _credentials[path]
+
+def _pooled_session(creds):
+    """
+    AuthorizedSession only refreshes the token when it is missing or
+    expired; the mounted adapter keeps TLS connections alive and
+    paces requests against the Sheets quota
+    """
+    session = AuthorizedSession(creds)
+    adapter = QuotaAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount("https://", adapter)
+    return session
+
+# ===============================
+# CLIENT / SPREADSHEET / WORKSHEET
+# ===============================
+def get_client(service_account_file=None):
+    path = service_account_file or DEFAULT_SERVICE_ACCOUNT_FILE
+    with _lock:
+        if path not in _clients:
+            creds = get_credentials(path)
+            _clients[path] = gspread.Client(auth=creds, session=_pooled_session(creds))
+        return _clients[path]
+
+def open_spreadsheet(spreadsheet_id=None, service_account_file=None):
+    path = service_account_file or DEFAULT_SERVICE_ACCOUNT_FILE
+    sheet_id = spreadsheet_id or DEFAULT_SPREADSHEET_ID
+    if not sheet_id:
+        raise EnvironmentError("❌ SPREADSHEET_ID not configured")
+
+    key = (path, sheet_id)
+    with _lock:
+        if key not in _spreadsheets:
+            _spreadsheets[key] = get_client(path).open_by_key(sheet_id)
+        return _spreadsheets[key]
+
+def get_worksheet(title, spreadsheet_id=None, service_account_file=None,
+                  create=False, rows="1000", cols="10"):
+    """
+    Returns a cached Worksheet handle.
+    Raises gspread WorksheetNotFound unless create=True.
+    """
+    sheet = open_spreadsheet(spreadsheet_id, service_account_file)
+    key = (service_account_file or DEFAULT_SERVICE_ACCOUNT_FILE, sheet.id, title)
+
+    with _lock:
+        if key in _worksheets:
+            return _worksheets[key]
+
+        try:
+            ws = sheet.worksheet(title)
+        except gspread.exceptions.WorksheetNotFound:
+            if not create:
+                raise
+            ws = sheet.add_worksheet(title=title, rows=rows, cols=cols)
+
+        _worksheets[key] = ws
+        return ws
+
+def forget_worksheet(title=None):
+    """
+    Drops cached Worksheet handles (all, or one title),
+    e.g. after a tab is deleted or renamed outside this process
+    """
+    with _lock:
+        for key in list(_worksheets):
+            if title is None or key[2] == title:
+                del _worksheets[key]
@@ -0,0 +1,264 @@
+"""
+Shared Google Sheets I/O Helpers
+--------------------------------
+- A1 column conversion that works past column Z
+- Batched column write-back through values.batchUpdate
+  (grid grown first when new columns / rows fall outside it)
+- Row writes at fixed row numbers (write_rows), safe to replay
+- Adjacent output columns merged into one multi-column range
+- Payload-aware chunking so large tabs stay under request limits
+- Buffered append_rows writer with duplicate-safe retries
+"""
+
+import time
+
+# ===============================
+# LIMITS
+# ===============================
+# Rows per range; long runs are split so a single range never gets huge
+MAX_ROWS_PER_RANGE = 1000
+
+# Rough character budget per batchUpdate body (Sheets recommends ~2 MB)
+MAX_CHARS_PER_REQUEST = 1_500_000
+
+# Default rows per append_rows call for BufferedAppender
+APPEND_CHUNK_ROWS = 500
+
+# ===============================
+# A1 HELPERS
+# ===============================
+def column_letter(col):
+    """
+    Converts a 1-based column number to its A1 letters
+    (1 -> A, 26 -> Z, 27 -> AA, 703 -> AAA)
+    """
+    if col < 1:
+        raise ValueError(f"❌ Invalid column number: {col}")
+
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def a1_range(start_row, start_col, end_row, end_col):
+    return (
+        f"{column_letter(start_col)}{start_row}:"
+        f"{column_letter(end_col)}{end_row}"
+    )
+
+# ===============================
+# RANGE BUILDING
+# ===============================
+def _row_runs(rows, cells):
+    """
+    Splits sorted row numbers into runs of consecutive rows,
+    each run capped at MAX_ROWS_PER_RANGE rows
+    """
+    run_start, run_values, prev = None, [], None
+
+    for row in rows:
+        if prev is None or row != prev + 1 or len(run_values) >= MAX_ROWS_PER_RANGE:
+            if run_values:
+                yield run_start, run_values
+            run_start, run_values = row, []
+        run_values.append(cells(row))
+        prev = row
+
+    if run_values:
+        yield run_start, run_values
+
+def _column_blocks(columns):
+    """
+    Groups adjacent columns that cover the same rows,
+    so they can be written as one multi-column range
+    """
+    block = []
+    for col in sorted(columns):
+        if block and col == block[-1] + 1 and columns[col].keys() == columns[block[0]].keys():
+            block.append(col)
+        else:
+            if block:
+                yield block
+            block = [col]
+    if block:
+        yield block
+
+def build_column_ranges(columns):
+    """
+    columns: {col_number: {row_number: value}}
+    Returns batch_update entries, one range per contiguous run of rows.
+    Adjacent columns with the same rows share a single range.
+    """
+    data = []
+    for block in _column_blocks(columns):
+        rows = sorted(columns[block[0]])
+        cells = lambda row: [columns[col][row] for col in block]
+
+        for start, values in _row_runs(rows, cells):
+            data.append({
+                "range": a1_range(start, block[0], start + len(values) - 1, block[-1]),
+                "values": values,
+            })
+    return data
+
+def _payload_size(entry):
+    return sum(len(str(v)) for row in entry["values"] for v in row)
+
+def _chunk_requests(data, max_chars=MAX_CHARS_PER_REQUEST):
+    chunk, size = [], 0
+    for entry in data:
+        entry_size = _payload_size(entry)
+        if chunk and size + entry_size > max_chars:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(entry)
+        size += entry_size
+    if chunk:
+        yield chunk
+
+# ===============================
+# BATCHED WRITE-BACK
+# ===============================
+def ensure_grid(ws, rows, cols):
+    """
+    Grows the worksheet so cell (rows, cols) exists; values.batchUpdate
+    rejects ranges past the grid ("exceeds grid limits").
+    Returns the number of API calls issued.
+    """
+    calls = 0
+    if cols > ws.col_count:
+        ws.add_cols(cols - ws.col_count)
+        calls += 1
+    if rows > ws.row_count:
+        ws.add_rows(rows - ws.row_count)
+        calls += 1
+    return calls
+
+def write_columns(ws, columns, value_input_option="RAW"):
+    """
+    Writes {col_number: {row_number: value}} back to a worksheet
+    using as few values.batchUpdate calls as the payload limit allows.
+    The grid is widened / lengthened first when the cells fall outside it.
+    Returns the number of API calls issued.
+    """
+    if not columns:
+        return 0
+    calls = ensure_grid(
+        ws,
+        max((max(cells) for cells in columns.values() if cells), default=1),
+        max(columns),
+    )
+    for chunk in _chunk_requests(build_column_ranges(columns)):
+        ws.batch_update(chunk, value_input_option=value_input_option)
+        calls += 1
+    return calls
+
+def write_rows(ws, start_row, rows, value_input_option="RAW"):
+    """
+    Writes rows at fixed sheet rows (start_row, start_row + 1, ...)
+    using values.batchUpdate. Unlike append_rows, sending the same rows
+    again overwrites them instead of adding duplicates.
+    Returns the number of API calls issued.
+    """
+    rows = [list(r) for r in rows]
+    if not rows:
+        return 0
+    calls = ensure_grid(ws, start_row + len(rows) - 1, max(max(len(r) for r in rows), 1))
+
+    data = []
+    for offset in range(0, len(rows), MAX_ROWS_PER_RANGE):
+        run = rows[offset:offset + MAX_ROWS_PER_RANGE]
+        first = start_row + offset
+        data.append({
+            "range": a1_range(first, 1, first + len(run) - 1, max(max(len(r) for r in run), 1)),
+            "values": run,
+        })
+    for chunk in _chunk_requests(data):
+        ws.batch_update(chunk, value_input_option=value_input_option)
+        calls += 1
+    return calls
+
+# ===============================
+# BUFFERED APPEND WRITER
+# ===============================
+class BufferedAppender:
+    """
+    Collects rows and flushes them with append_rows in chunks.
+
+    - Flushes automatically once chunk_size rows are buffered
+    - Flushes the remainder on close() / leaving a `with` block
+    - On a failed chunk, re-counts the rows in column A before retrying,
+      so a request that reached the sheet is never appended twice
+      (column A must always be filled, e.g. an ID or timestamp)
+    """
+
+    def __init__(self, ws, chunk_size=APPEND_CHUNK_ROWS,
+                 value_input_option="RAW", max_retries=3, retry_delay=2):
+        self.ws = ws
+        self.chunk_size = chunk_size
+        self.value_input_option = value_input_option
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self.buffer = []
+        self.rows_written = 0
+        self.api_calls = 0
+        self._sheet_rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def append(self, row):
+        self.buffer.append(list(row))
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def close(self):
+        self.flush()
+
+    def flush(self):
+        while self.buffer:
+            chunk = self.buffer[:self.chunk_size]
+            self._write_chunk(chunk)
+            del self.buffer[:len(chunk)]
+            self.rows_written += len(chunk)
+
+    def _count_sheet_rows(self):
+        self.api_calls += 1
+        return len(self.ws.col_values(1))
+
+    def _write_chunk(self, chunk):
+        if self._sheet_rows is None:
+            self._sheet_rows = self._count_sheet_rows()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.api_calls += 1
+                self.ws.append_rows(chunk, value_input_option=self.value_input_option)
+                self._sheet_rows += len(chunk)
+                return
+            except Exception as e:
+                # Request may have landed before the error surfaced
+                try:
+                    current = self._count_sheet_rows()
+                except Exception:
+                    current = None
+
+                if current is not None and current >= self._sheet_rows + len(chunk):
+                    self._sheet_rows = current
+                    return
+
+                if attempt == self.max_retries:
+                    raise
+
+                print(f"⚠️ append_rows failed ({e}), retrying {attempt + 1}/{self.max_retries}...")
+                time.sleep(self.retry_delay * (2 ** attempt))
@@ -0,0 +1,140 @@
+"""
+Sheets API Quota Scheduler
+--------------------------
+- Token buckets for read and write requests, tuned to the Sheets
+  per-minute quotas (SHEETS_READS_PER_MIN / SHEETS_WRITES_PER_MIN)
+- Callers queue for the next free slot instead of bursting into 429s
+- Jittered exponential backoff (honours Retry-After): 429 is always
+  retried (the request was rejected before it ran); 5xx only for
+  idempotent requests. A 5xx on values:append may come after the rows
+  landed, so it goes back to the caller, whose retry first checks
+  the row count (BufferedAppender, sinks.append_values)
+- QuotaAdapter paces gspread traffic on the shared session,
+  execute() paces googleapiclient requests (collectors, uploader)
+"""
+
+# ===============================
+# IMPORTS
+# ===============================
+import os
+import time
+import random
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from rate_limit import TokenBucket
+
+# ===============================
+# LOAD ENV
+# ===============================
+load_dotenv()
+
+# Default Sheets quota: 60 read + 60 write requests / minute / user
+READS_PER_MIN = float(os.getenv("SHEETS_READS_PER_MIN", "60"))
+WRITES_PER_MIN = float(os.getenv("SHEETS_WRITES_PER_MIN", "60"))
+
+MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "6"))
+BACKOFF_BASE = 1.0     # seconds
+BACKOFF_CAP = 64.0     # seconds
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Safe to re-send after a 5xx: repeating them cannot duplicate data
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+IDEMPOTENT_POST_ACTIONS = (
+    "/values:batchGet", "/values:batchGetByDataFilter",
+    "/values:batchUpdate", "/values:batchUpdateByDataFilter",
+    "/values:batchClear", "/values:batchClearByDataFilter", ":clear",
+)
+
+# ===============================
+# BUCKETS
+# ===============================
+BUCKETS = {
+    "read": TokenBucket(READS_PER_MIN),
+    "write": TokenBucket(WRITES_PER_MIN),
+}
+
+# ===============================
+# BACKOFF
+# ===============================
+def backoff_delay(attempt, retry_after=None):
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    # "Full jitter" exponential backoff
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+def _status_of(exc):
+    """HTTP status from googleapiclient HttpError / gspread APIError"""
+    resp = getattr(exc, "resp", None)
+    if resp is not None and getattr(resp, "status", None):
+        return int(resp.status)
+    response = getattr(exc, "response", None)
+    if response is not None and getattr(response, "status_code", None):
+        return int(response.status_code)
+    return None
+
+def is_idempotent(method, url):
+    """values.update / batchUpdate / clear yes; values:append, spreadsheets.batchUpdate no"""
+    method = (method or "GET").upper()
+    if method in IDEMPOTENT_METHODS:
+        return True
+    return method == "POST" and urlsplit(url).path.endswith(IDEMPOTENT_POST_ACTIONS)
+
+def should_retry(status, idempotent):
+    return status == 429 or (idempotent and status in RETRY_STATUSES)
+
+def call(fn, kind="write", idempotent=None):
+    """
+    Runs fn() inside the quota scheduler.
+    Retries 429 failures, and 5xx ones when the call is idempotent
+    (default: reads only), with jittered exponential backoff.
+    """
+    if idempotent is None:
+        idempotent = kind == "read"
+    bucket = BUCKETS[kind]
+    for attempt in range(MAX_RETRIES + 1):
+        bucket.acquire()
+        try:
+            return fn()
+        except Exception as e:
+            if not should_retry(_status_of(e), idempotent) or attempt == MAX_RETRIES:
+                raise
+            bucket.throttle()
+            delay = backoff_delay(attempt)
+            print(f"⏳ Sheets API {_status_of(e)}, retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+def execute(request, kind="write"):
+    """Paced googleapiclient request.execute()"""
+    return call(request.execute, kind, is_idempotent(request.method, request.uri))
+
+# ===============================
+# GSPREAD SESSION ADAPTER
+# ===============================
+class QuotaAdapter(HTTPAdapter):
+    """
+    Mounted on the shared Sheets session: every HTTP request waits for a
+    read (GET) or write (anything else) token and is re-sent on 429,
+    or on 5xx when it is idempotent
+    """
+
+    def send(self, request, **kwargs):
+        bucket = BUCKETS["read" if request.method in ("GET", "HEAD") else "write"]
+        idempotent = is_idempotent(request.method, request.url)
+
+        for attempt in range(MAX_RETRIES + 1):
+            bucket.acquire()
+            response = super().send(request, **kwargs)
+            if not should_retry(response.status_code, idempotent) or attempt == MAX_RETRIES:
+                return response
+
+            bucket.throttle()
+            delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+            print(f"⏳ Sheets API {response.status_code}, retrying in {delay:.1f}s...")
+            response.close()
+            time.sleep(delay)
@@ -0,0 +1,260 @@
+"""
+Streaming Record Sinks
+----------------------
+- Collectors yield records; sinks write them as they arrive, so peak
+  memory is one chunk no matter how many posts are collected
+- CsvSink     : append-mode CSV (header only when the file is new)
+- ParquetSink : one part file per run in a dataset directory, written
+                row group by row group (needs pyarrow)
+- StorageSink : chunked appends to a storage tab (Google Sheets /
+                SQLite, see storage.py)
+- drain()     : streams any iterable of records into one or more sinks
+- append_values() : chunked values().append for googleapiclient callers
+                    (duplicate-safe retries)
+
+A record is a dict keyed by the sink's fields, or a list already in
+field order.
+"""
+
+# ===============================
+# IMPORTS
+# ===============================
+import os
+import csv
+import time
+from dotenv import load_dotenv
+
+from sheets_io import APPEND_CHUNK_ROWS
+
+# ===============================
+# LOAD ENV
+# ===============================
+load_dotenv()
+
+PARQUET_ROW_GROUP = int(os.getenv("PARQUET_ROW_GROUP", "5000"))
+
+def _as_row(record, fields):
+    if isinstance(record, dict):
+        return [record.get(f, "") for f in fields]
+    return list(record)
+
+# ===============================
+# BASE
+# ===============================
+class Sink:
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def write(self, record):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+# ===============================
+# CSV
+# ===============================
+class CsvSink(Sink):
+    def __init__(self, path, fields, append=True):
+        super().__init__(fields)
+        is_new = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        if is_new:
+            self.writer.writerow(self.fields)
+
+    def write(self, record):
+        self.writer.writerow(_as_row(record, self.fields))
+        self.rows_written += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+# ===============================
+# PARQUET
+# ===============================
+class ParquetSink(Sink):
+    """
+    Parquet files cannot be appended to in place, so `path` is a dataset
+    directory and every run adds a part file (pd.read_parquet(path)
+    reads them all back). All columns are stored as strings.
+    """
+
+    def __init__(self, path, fields, row_group=PARQUET_ROW_GROUP):
+        super().__init__(fields)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("❌ ParquetSink needs pyarrow (pip install pyarrow)")
+
+        self._pa = pa
+        self.schema = pa.schema([(f, pa.string()) for f in self.fields])
+        self.row_group = row_group
+        self.buffer = []
+
+        os.makedirs(path, exist_ok=True)
+        self.file_path = os.path.join(path, f"part-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.parquet")
+        self.writer = pq.ParquetWriter(self.file_path, self.schema)
+
+    def write(self, record):
+        self.buffer.append(["" if v is None else str(v) for v in _as_row(record, self.fields)])
+        if len(self.buffer) >= self.row_group:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        columns = list(zip(*self.buffer))
+        self.writer.write_table(self._pa.Table.from_arrays(
+            [self._pa.array(col, type=self._pa.string()) for col in columns],
+            schema=self.schema
+        ))
+        self.rows_written += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        if self.writer is not None:
+            self.flush()
+            self.writer.close()
+            self.writer = None
+
+# ===============================
+# STORAGE (SHEETS / SQLITE)
+# ===============================
+class StorageSink(Sink):
+    """Appends to a storage tab every chunk_size records; headers only on a new tab"""
+
+    def __init__(self, table, fields, store=None, chunk_size=APPEND_CHUNK_ROWS):
+        super().__init__(fields)
+        if store is None:
+            from storage import get_storage
+            store = get_storage()
+        self.store = store
+        self.table = table
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self._headers_checked = False
+
+    def write(self, record):
+        self.buffer.append(_as_row(record, self.fields))
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        headers = None if self._headers_checked else self.fields
+        self.store.append_rows(self.table, self.buffer, headers=headers, chunk_size=self.chunk_size)
+        self._headers_checked = True
+        self.rows_written += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+
+class MemorySink(Sink):
+    """Keeps every record (small runs / interactive use)"""
+
+    def __init__(self, fields=()):
+        super().__init__(fields)
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+        self.rows_written += 1
+
+# ===============================
+# DRAIN
+# ===============================
+def drain(records, *sinks):
+    """Streams records into every sink, closing them at the end. Returns the record count."""
+    count = 0
+    try:
+        for record in records:
+            for sink in sinks:
+                sink.write(record)
+            count += 1
+    finally:
+        for sink in sinks:
+            sink.close()
+    return count
+
+# ===============================
+# GOOGLEAPICLIENT APPENDS
+# ===============================
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(list(row))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _count_rows(service, spreadsheet_id, tab):
+    from sheets_quota import execute
+
+    result = execute(service.spreadsheets().values().get(
+        spreadsheetId=spreadsheet_id, range=f"{tab}!A:A", majorDimension="COLUMNS"
+    ), "read")
+    values = result.get("values", [])
+    return len(values[0]) if values else 0
+
+def append_values(service, spreadsheet_id, tab, rows, chunk_rows=APPEND_CHUNK_ROWS,
+                  max_retries=3, retry_delay=2):
+    """
+    Appends any iterable of rows below the data in `tab`, one
+    values().append call per chunk_rows rows. Returns the row count.
+
+    A failed append may still have landed, so column A is re-counted
+    before retrying and a chunk is never written twice
+    (column A must always be filled), as in sheets_io.BufferedAppender.
+    """
+    from sheets_quota import execute
+
+    count = 0
+    sheet_rows = None
+    for chunk in _chunks(rows, chunk_rows):
+        if sheet_rows is None:
+            sheet_rows = _count_rows(service, spreadsheet_id, tab)
+
+        for attempt in range(max_retries + 1):
+            try:
+                execute(service.spreadsheets().values().append(
+                    spreadsheetId=spreadsheet_id,
+                    range=f"{tab}!A1",
+                    valueInputOption="RAW",
+                    insertDataOption="INSERT_ROWS",
+                    body={"values": chunk}
+                ))
+                sheet_rows += len(chunk)
+                break
+            except Exception as e:
+                try:
+                    current = _count_rows(service, spreadsheet_id, tab)
+                except Exception:
+                    current = None
+
+                if current is not None and current >= sheet_rows + len(chunk):
+                    sheet_rows = current
+                    break
+
+                if attempt == max_retries:
+                    raise
+
+                print(f"⚠️ values.append failed ({e}), retrying {attempt + 1}/{max_retries}...")
+                time.sleep(retry_delay * (2 ** attempt))
+
+        count += len(chunk)
+    return count
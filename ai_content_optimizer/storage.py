@@ -0,0 +1,580 @@
+"""
+Pipeline Storage Layer
+----------------------
+- One table API shared by every stage (read / append / update / replace)
+- SheetsStorage : Google Sheets tabs (original behaviour)
+- SQLiteStorage : local embedded database, runs fully offline
+- SyncedStorage : SQLite as system of record, Google Sheets as an
+                  asynchronous sync target (durable, retried sync queue)
+- Selected with STORAGE_BACKEND = sheets | sqlite | sqlite+sheets
+- CachedStorage : TTL read cache in front of any backend, invalidated
+                  whenever this process writes to a tab (STORAGE_CACHE_TTL)
+
+Row numbers follow the sheet convention everywhere:
+row 1 holds the headers, data starts at row 2.
+"""
+
+# ===============================
+# IMPORTS
+# ===============================
+import os
+import json
+import atexit
+import time
+import sqlite3
+import threading
+from dotenv import load_dotenv
+
+from sheets_io import APPEND_CHUNK_ROWS, BufferedAppender, write_columns, write_rows
+
+# ===============================
+# LOAD ENV
+# ===============================
+load_dotenv()
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sheets").lower()
+STORAGE_PATH = os.getenv("STORAGE_PATH", "pipeline.db")
+
+# Seconds a tab read stays in memory (0 disables the cache)
+STORAGE_CACHE_TTL = float(os.getenv("STORAGE_CACHE_TTL", "300"))
+
+# Attempts per queued Google Sheets sync op before it is left for a later retry
+SYNC_MAX_RETRIES = int(os.getenv("SYNC_MAX_RETRIES", "3"))
+SYNC_RETRY_DELAY = float(os.getenv("SYNC_RETRY_DELAY", "2"))
+
+BACKENDS = ("sheets", "sqlite", "sqlite+sheets")
+
+if STORAGE_BACKEND not in BACKENDS:
+    raise EnvironmentError(f"❌ STORAGE_BACKEND must be one of {BACKENDS}")
+
+# ===============================
+# BASE API
+# ===============================
+class Storage:
+    def read_table(self, table):
+        """Returns (headers, rows) with every cell as a string"""
+        raise NotImplementedError
+
+    def read_headers(self, table):
+        return self.read_table(table)[0]
+
+    def read_records(self, table):
+        headers, rows = self.read_table(table)
+        return [
+            dict(zip(headers, row + [""] * (len(headers) - len(row))))
+            for row in rows
+        ]
+
+    def append_rows(self, table, rows, headers=None, **kwargs):
+        """Appends rows; headers are written only when the table is new/empty"""
+        raise NotImplementedError
+
+    def write_rows(self, table, start_row, rows, headers=None, **kwargs):
+        """Writes rows at fixed row numbers from start_row on; headers (if given) go to row 1"""
+        raise NotImplementedError
+
+    def replace_table(self, table, headers, rows):
+        raise NotImplementedError
+
+    def update_cells(self, table, updates):
+        """
+        updates: {column_name: {row_number: value}}
+        Missing columns are added after the existing headers.
+        Returns the number of remote API calls issued.
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def invalidate(self, table=None):
+        pass
+
+# ===============================
+# GOOGLE SHEETS BACKEND
+# ===============================
+class SheetsStorage(Storage):
+    def __init__(self, spreadsheet_id=None, service_account_file=None):
+        self.spreadsheet_id = spreadsheet_id
+        self.service_account_file = service_account_file
+
+    def _ws(self, table, create=False, cols=10):
+        from sheets_client import get_worksheet
+        return get_worksheet(
+            table, self.spreadsheet_id, self.service_account_file,
+            create=create, rows="1000", cols=str(max(cols, 10))
+        )
+
+    def _existing_ws(self, table):
+        """None when the tab does not exist yet (reads treat it as empty)"""
+        from gspread.exceptions import WorksheetNotFound
+        try:
+            return self._ws(table)
+        except WorksheetNotFound:
+            return None
+
+    def read_table(self, table):
+        ws = self._existing_ws(table)
+        values = ws.get_all_values() if ws else []
+        if not values:
+            return [], []
+        return values[0], values[1:]
+
+    def read_headers(self, table):
+        ws = self._existing_ws(table)
+        return ws.row_values(1) if ws else []
+
+    def read_records(self, table):
+        ws = self._existing_ws(table)
+        return ws.get_all_records() if ws else []
+
+    def append_rows(self, table, rows, headers=None,
+                    chunk_size=APPEND_CHUNK_ROWS, value_input_option="RAW"):
+        ws = self._ws(table, create=True, cols=len(headers or []))
+        with BufferedAppender(ws, chunk_size, value_input_option) as writer:
+            if headers and not ws.row_values(1):
+                writer.append(headers)
+            writer.extend(rows)
+        return writer.api_calls
+
+    def write_rows(self, table, start_row, rows, headers=None, value_input_option="RAW", **kwargs):
+        ws = self._ws(table, create=True, cols=len(headers or []))
+        calls = write_rows(ws, 1, [headers], value_input_option) if headers else 0
+        return calls + write_rows(ws, start_row, rows, value_input_option)
+
+    def replace_table(self, table, headers, rows):
+        ws = self._ws(table, create=True, cols=len(headers))
+        ws.clear()
+        with BufferedAppender(ws) as writer:
+            writer.append(headers)
+            writer.extend(rows)
+        return writer.api_calls + 1
+
+    def update_cells(self, table, updates):
+        ws = self._ws(table, create=True, cols=len(updates))
+        headers = ws.row_values(1)
+        calls = 1
+
+        missing = [name for name in updates if name not in headers]
+        if missing:
+            calls += write_columns(ws, {
+                len(headers) + i + 1: {1: name} for i, name in enumerate(missing)
+            })
+            headers += missing
+
+        columns = {headers.index(name) + 1: cells for name, cells in updates.items()}
+        return calls + write_columns(ws, columns)
+
+# ===============================
+# SQLITE BACKEND
+# ===============================
+class SQLiteStorage(Storage):
+    """
+    Each tab is a SQLite table with a _row column (sheet row number)
+    and positional value columns c1..cN; header names live in _tables,
+    so any sheet header (spaces, %, duplicates) round-trips unchanged.
+    """
+
+    def __init__(self, path=STORAGE_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS _tables (name TEXT PRIMARY KEY, headers TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    # ---------- internals ----------
+    @staticmethod
+    def _sql_name(table):
+        return '"t_' + table.replace('"', '""') + '"'
+
+    def has_table(self, table):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM _tables WHERE name = ?", (table,)
+            ).fetchone() is not None
+
+    def _set_headers(self, table, headers):
+        """Creates the table or widens it to len(headers) columns"""
+        current = self.read_headers(table) if self.has_table(table) else None
+        name = self._sql_name(table)
+
+        if current is None:
+            cols = "".join(f", c{i} " for i in range(1, len(headers) + 1))
+            self.conn.execute(f"CREATE TABLE {name} (_row INTEGER PRIMARY KEY{cols})")
+        else:
+            for i in range(len(current) + 1, len(headers) + 1):
+                self.conn.execute(f"ALTER TABLE {name} ADD COLUMN c{i}")
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO _tables (name, headers) VALUES (?, ?)",
+            (table, json.dumps(headers)),
+        )
+
+    def _select(self, table):
+        headers = self.read_headers(table)
+        if not headers:
+            return [], []
+        cols = ", ".join(f"c{i}" for i in range(1, len(headers) + 1))
+        rows = self.conn.execute(
+            f"SELECT {cols} FROM {self._sql_name(table)} ORDER BY _row"
+        ).fetchall()
+        return headers, rows
+
+    def _next_row(self, table):
+        last = self.conn.execute(
+            f"SELECT MAX(_row) FROM {self._sql_name(table)}"
+        ).fetchone()[0]
+        return (last or 1) + 1
+
+    # ---------- API ----------
+    def read_headers(self, table):
+        with self._lock:
+            found = self.conn.execute(
+                "SELECT headers FROM _tables WHERE name = ?", (table,)
+            ).fetchone()
+            return json.loads(found[0]) if found else []
+
+    def read_table(self, table):
+        with self._lock:
+            headers, rows = self._select(table)
+            return headers, [["" if v is None else str(v) for v in row] for row in rows]
+
+    def read_records(self, table):
+        with self._lock:
+            headers, rows = self._select(table)
+            return [
+                dict(zip(headers, ("" if v is None else v for v in row)))
+                for row in rows
+            ]
+
+    def append_rows(self, table, rows, headers=None, **kwargs):
+        rows = [list(r) for r in rows]
+        with self._lock, self.conn:
+            current = self.read_headers(table)
+            if not current:
+                current = list(headers or [])
+
+            width = max([len(current)] + [len(r) for r in rows])
+            self._set_headers(table, current + [""] * (width - len(current)))
+
+            start = self._next_row(table)
+            placeholders = ", ".join("?" * (width + 1))
+            self.conn.executemany(
+                f"INSERT INTO {self._sql_name(table)} VALUES ({placeholders})",
+                [
+                    [start + i] + r + [None] * (width - len(r))
+                    for i, r in enumerate(rows)
+                ],
+            )
+        return 0
+
+    def replace_table(self, table, headers, rows):
+        with self._lock, self.conn:
+            self.conn.execute(f"DROP TABLE IF EXISTS {self._sql_name(table)}")
+            self.conn.execute("DELETE FROM _tables WHERE name = ?", (table,))
+        self.append_rows(table, rows, headers=headers)
+        return 0
+
+    def update_cells(self, table, updates):
+        with self._lock, self.conn:
+            headers = self.read_headers(table)
+            missing = [name for name in updates if name not in headers]
+            if missing or not self.has_table(table):
+                headers = headers + missing
+                self._set_headers(table, headers)
+
+            name = self._sql_name(table)
+            for col_name, cells in updates.items():
+                col = f"c{headers.index(col_name) + 1}"
+                for row, value in cells.items():
+                    self.conn.execute(
+                        f"INSERT INTO {name} (_row, {col}) VALUES (?, ?) "
+                        f"ON CONFLICT(_row) DO UPDATE SET {col} = excluded.{col}",
+                        (row, value),
+                    )
+        return 0
+
+# ===============================
+# LOCAL + ASYNC SHEETS SYNC
+# ===============================
+class SyncError(RuntimeError):
+    pass
+
+class SyncedStorage(Storage):
+    """
+    Reads and writes hit SQLite; every write is replayed against
+    Google Sheets by one background worker (in order).
+    A tab missing locally is seeded once from Sheets, so row numbers match;
+    a write to a tab that could not be seeded fails instead of misaligning rows.
+
+    Pending sync ops live in the _sync_queue table of the SQLite file:
+    a failed op is retried (SYNC_MAX_RETRIES), then kept at the head of
+    the queue and replayed on the next write, flush() or run.
+    Every op targets explicit rows (appends are queued with the rows
+    SQLite assigned), so replaying one never duplicates sheet rows.
+    flush() raises SyncError while ops are still pending.
+    """
+
+    def __init__(self, local, remote, max_retries=SYNC_MAX_RETRIES, retry_delay=SYNC_RETRY_DELAY):
+        self.local = local
+        self.remote = remote
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._seeded = set()
+        self._seed_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._wake = threading.Event()
+
+        with self.local._lock, self.local.conn:
+            self.local.conn.execute(
+                "CREATE TABLE IF NOT EXISTS _sync_queue ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, method TEXT NOT NULL, "
+                "tab TEXT NOT NULL, payload TEXT NOT NULL)"
+            )
+        if self.pending():
+            self._wake.set()
+
+        worker = threading.Thread(target=self._sync_worker, daemon=True)
+        worker.start()
+        atexit.register(self._flush_at_exit)
+
+    def _seed(self, table, write=False):
+        with self._seed_lock:
+            if table in self._seeded:
+                return
+            if not self.local.has_table(table):
+                try:
+                    headers, rows = self.remote.read_table(table)
+                except Exception as e:
+                    if write:
+                        raise SyncError(
+                            f"❌ Could not seed '{table}' from Google Sheets, "
+                            f"local rows would not match the sheet: {e}"
+                        ) from e
+                    print(f"⚠️ Could not seed '{table}' from Google Sheets: {e}")
+                    return
+                if headers:
+                    self.local.replace_table(table, headers, rows)
+            self._seeded.add(table)
+
+    # ---------- durable sync queue ----------
+    @staticmethod
+    def _dump(method, args, kwargs):
+        if method == "update_cells":
+            # JSON object keys are strings; keep row numbers as ints
+            args = ([[name, list(cells.items())] for name, cells in args[0].items()],)
+        return json.dumps({"args": list(args), "kwargs": kwargs}, default=str)
+
+    @staticmethod
+    def _load(method, payload):
+        data = json.loads(payload)
+        args = data["args"]
+        if method == "update_cells":
+            args = [{name: {int(row): value for row, value in cells} for name, cells in args[0]}]
+        return args, data["kwargs"]
+
+    def _sync(self, method, table, *args, **kwargs):
+        with self.local._lock, self.local.conn:
+            self.local.conn.execute(
+                "INSERT INTO _sync_queue (method, tab, payload) VALUES (?, ?, ?)",
+                (method, table, self._dump(method, args, kwargs)),
+            )
+        self._wake.set()
+
+    def pending(self):
+        with self.local._lock:
+            return self.local.conn.execute("SELECT COUNT(*) FROM _sync_queue").fetchone()[0]
+
+    def _next_op(self):
+        with self.local._lock:
+            return self.local.conn.execute(
+                "SELECT id, method, tab, payload FROM _sync_queue ORDER BY id LIMIT 1"
+            ).fetchone()
+
+    def _drain(self):
+        """Replays queued ops in order; returns (op description, error) for the op that kept failing"""
+        with self._drain_lock:
+            while True:
+                op = self._next_op()
+                if op is None:
+                    return None
+                op_id, method, table, payload = op
+                args, kwargs = self._load(method, payload)
+
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        getattr(self.remote, method)(table, *args, **kwargs)
+                        break
+                    except Exception as e:
+                        if attempt == self.max_retries:
+                            return f"{method} {table}", e
+                        time.sleep(self.retry_delay * (2 ** attempt))
+
+                with self.local._lock, self.local.conn:
+                    self.local.conn.execute("DELETE FROM _sync_queue WHERE id = ?", (op_id,))
+
+    def _sync_worker(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            failed = self._drain()
+            if failed:
+                print(f"⚠️ Google Sheets sync failed ({failed[0]}): {failed[1]} "
+                      f"— {self.pending()} op(s) kept for retry")
+
+    # ---------- API ----------
+    def read_table(self, table):
+        self._seed(table)
+        return self.local.read_table(table)
+
+    def read_headers(self, table):
+        self._seed(table)
+        return self.local.read_headers(table)
+
+    def read_records(self, table):
+        self._seed(table)
+        return self.local.read_records(table)
+
+    def append_rows(self, table, rows, headers=None, **kwargs):
+        rows = [list(r) for r in rows]
+        self._seed(table, write=True)
+        with self.local._lock:
+            new = not self.local.has_table(table)
+            start = 2 if new else self.local._next_row(table)
+            self.local.append_rows(table, rows, headers=headers)
+
+        # Replayed as a write to the rows SQLite just assigned, not as an
+        # append: a chunk that landed before an error, or an op replayed
+        # after a crash, rewrites the same rows instead of duplicating them
+        options = {k: v for k, v in kwargs.items() if k == "value_input_option"}
+        self._sync("write_rows", table, start, rows, headers=headers if new else None, **options)
+        return 0
+
+    def replace_table(self, table, headers, rows):
+        rows = [list(r) for r in rows]
+        self._seeded.add(table)
+        self.local.replace_table(table, headers, rows)
+        self._sync("replace_table", table, headers, rows)
+        return 0
+
+    def update_cells(self, table, updates):
+        self._seed(table, write=True)
+        self.local.update_cells(table, updates)
+        self._sync("update_cells", table, updates)
+        return 0
+
+    def flush(self):
+        """
+        Blocks until every queued write has reached Google Sheets;
+        raises SyncError when an op still fails after its retries
+        """
+        failed = self._drain()
+        if failed:
+            raise SyncError(
+                f"❌ Google Sheets sync failed ({failed[0]}): {failed[1]} "
+                f"— {self.pending()} op(s) kept in {self.local.path}"
+            ) from failed[1]
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except SyncError as e:
+            print(f"{e}; they are replayed on the next run")
+
+# ===============================
+# TTL READ CACHE
+# ===============================
+class CachedStorage(Storage):
+    """
+    Serves repeated reads of a tab from memory for `ttl` seconds.
+    Any write through this object drops that tab's entries, so results
+    are fresh right after run_ab_testing() / upload_metrics().
+    Cached rows are shared between callers: treat them as read-only.
+    """
+
+    def __init__(self, inner, ttl=STORAGE_CACHE_TTL):
+        self.inner = inner
+        self.ttl = ttl
+        self._cache = {}   # (method, table) -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, method, table):
+        key = (method, table)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = getattr(self.inner, method)(table)
+        with self._lock:
+            self._cache[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self, table=None):
+        with self._lock:
+            for key in list(self._cache):
+                if table is None or key[1] == table:
+                    del self._cache[key]
+        self.inner.invalidate(table)
+
+    def read_table(self, table):
+        return self._cached("read_table", table)
+
+    def read_headers(self, table):
+        return self._cached("read_headers", table)
+
+    def read_records(self, table):
+        return self._cached("read_records", table)
+
+    def append_rows(self, table, rows, headers=None, **kwargs):
+        try:
+            return self.inner.append_rows(table, rows, headers=headers, **kwargs)
+        finally:
+            self.invalidate(table)
+
+    def replace_table(self, table, headers, rows):
+        try:
+            return self.inner.replace_table(table, headers, rows)
+        finally:
+            self.invalidate(table)
+
+    def update_cells(self, table, updates):
+        try:
+            return self.inner.update_cells(table, updates)
+        finally:
+            self.invalidate(table)
+
+    def flush(self):
+        self.inner.flush()
+
+# ===============================
+# FACTORY
+# ===============================
+_storage = None
+_storage_lock = threading.Lock()
+
+def sheets_enabled():
+    return STORAGE_BACKEND in ("sheets", "sqlite+sheets")
+
+def get_storage():
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND == "sqlite":
+                _storage = SQLiteStorage()
+            elif STORAGE_BACKEND == "sqlite+sheets":
+                _storage = SyncedStorage(SQLiteStorage(), SheetsStorage())
+            else:
+                _storage = SheetsStorage()
+
+            if STORAGE_CACHE_TTL > 0:
+                _storage = CachedStorage(_storage)
+        return _storage
@@ -0,0 +1,81 @@
+"""
+Shared Text Features
+--------------------
+- Everything the rule-based scorers read from a text: word count,
+  hashtags, phrase-rule hits (CTA / keyword groups,
+  phrase_matcher.RULE_GROUPS) and the sentiment token sequence
+- Each feature is computed on first access only, so a scorer pays for
+  what it reads and nothing else; rule groups are checked one at a
+  time (hit(group))
+- Records are memoized per text (LRU keyed on the string itself,
+  TEXT_FEATURES_CACHE_SIZE entries): scorers running on the same text
+  in one process (dashboard, prediction_coach's four platforms) share
+  the work
+"""
+
+import os
+import re
+from functools import lru_cache
+
+from phrase_matcher import RULES
+from sentiment_engine import tokenize
+
+TEXT_FEATURES_CACHE_SIZE = int(os.getenv("TEXT_FEATURES_CACHE_SIZE", "50000"))
+
+HASHTAG_RE = re.compile(r"#\w+")
+
+class TextFeatures:
+    __slots__ = ("text", "_word_count", "_hashtags", "_lowered", "_hits", "_tokens")
+
+    def __init__(self, text):
+        self.text = text
+        self._word_count = None
+        self._hashtags = None
+        self._lowered = None
+        self._hits = {}
+        self._tokens = None
+
+    @property
+    def word_count(self):
+        """len(text.split())"""
+        if self._word_count is None:
+            self._word_count = len(self.text.split())
+        return self._word_count
+
+    @property
+    def hashtags(self):
+        """tuple, in order of appearance"""
+        if self._hashtags is None:
+            self._hashtags = tuple(HASHTAG_RE.findall(self.text)) if "#" in self.text else ()
+        return self._hashtags
+
+    def hit(self, group):
+        """True when a phrase of the RULE_GROUPS group occurs in the text"""
+        hits = self._hits
+        if group not in hits:
+            lowered = self._lowered
+            if lowered is None:
+                lowered = self._lowered = self.text.lower()
+            hits[group] = RULES.hit(lowered, group, lowered=True)
+        return hits[group]
+
+    @property
+    def tokens(self):
+        """lowercased sentiment tokens (words + punctuation)"""
+        if self._tokens is None:
+            self._tokens = tuple(tokenize(self.text))
+        return self._tokens
+
+    def __repr__(self):
+        return f"TextFeatures({self.text[:40]!r})"
+
+@lru_cache(maxsize=TEXT_FEATURES_CACHE_SIZE)
+def _cached(text):
+    return TextFeatures(text)
+
+def text_features(text):
+    """The shared TextFeatures for `text`; features are filled in as they are read"""
+    return _cached(text or "")
+
+def clear_cache():
+    _cached.cache_clear()
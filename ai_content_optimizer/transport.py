@@ -0,0 +1,108 @@
+"""
+Shared HTTP Transport
+---------------------
+- One pooled keep-alive requests.Session per API host
+  (get_session("instagram"), get_session("twitter"), ...)
+- Every request gets a default (connect, read) timeout
+- Pool size / timeouts: HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT,
+  HTTP_READ_TIMEOUT, overridable per host, e.g. HTTP_POOL_SIZE_INSTAGRAM
+- googleapiclient discovery clients (YouTube, Sheets) are built once per
+  thread and reused; httplib2 connections are not thread-safe, so
+  threads never share a client
+- Sheets credentials come from sheets_client's cache
+"""
+
+# ===============================
+# IMPORTS
+# ===============================
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+# ===============================
+# LOAD ENV
+# ===============================
+load_dotenv()
+
+def _setting(name, host, default):
+    value = os.getenv(f"{name}_{host.upper()}") or os.getenv(name)
+    return type(default)(value) if value else default
+
+# ===============================
+# REQUESTS SESSIONS
+# ===============================
+class TimeoutSession(requests.Session):
+    """Session that fills in a default timeout on every request"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+_lock = threading.Lock()
+_sessions = {}
+
+def get_session(host, pool_size=None, headers=None):
+    """
+    The shared session for one API host. pool_size / headers only
+    apply the first time the host's session is created.
+    """
+    with _lock:
+        if host not in _sessions:
+            size = pool_size or _setting("HTTP_POOL_SIZE", host, 10)
+            timeout = (
+                _setting("HTTP_CONNECT_TIMEOUT", host, 5.0),
+                _setting("HTTP_READ_TIMEOUT", host, 30.0),
+            )
+            session = TimeoutSession(timeout)
+            adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            if headers:
+                session.headers.update(headers)
+            _sessions[host] = session
+        return _sessions[host]
+
+# ===============================
+# DISCOVERY CLIENTS
+# ===============================
+_local = threading.local()
+
+def _http(api, credentials=None):
+    import httplib2
+
+    http = httplib2.Http(timeout=_setting("HTTP_READ_TIMEOUT", api, 30.0))
+    if credentials is None:
+        return http
+    from google_auth_httplib2 import AuthorizedHttp
+    return AuthorizedHttp(credentials, http=http)
+
+def get_discovery_client(api, version, credentials=None, developer_key=None, api_endpoint=None):
+    """A googleapiclient client for this thread, built on first use"""
+    from googleapiclient.discovery import build
+
+    clients = getattr(_local, "clients", None)
+    if clients is None:
+        clients = _local.clients = {}
+
+    key = (api, version, id(credentials), developer_key, api_endpoint)
+    if key not in clients:
+        clients[key] = build(
+            api, version,
+            developerKey=developer_key,
+            http=_http(api, credentials),
+            client_options={"api_endpoint": api_endpoint} if api_endpoint else None,
+            cache_discovery=False,
+        )
+    return clients[key]
+
+def sheets_service(service_account_file=None):
+    # Same cached credentials as the gspread client (sheets_client)
+    from sheets_client import get_credentials
+
+    return get_discovery_client("sheets", "v4", credentials=get_credentials(service_account_file))
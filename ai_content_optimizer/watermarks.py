@@ -0,0 +1,32 @@
+"""
+Incremental Processing Watermarks
+---------------------------------
+- Hashes each row's input (Generated_Content, platform, ...) together
+  with the rule version that produced its outputs
+- The hash is stored next to the outputs (e.g. Optimization_Hash)
+- Later runs skip rows whose input and rules are unchanged
+- `--full` on the command line (or FULL_REFRESH=1) reprocesses everything
+"""
+
+import os
+import sys
+import hashlib
+
+def content_hash(*parts, version):
+    h = hashlib.sha1(f"v{version}".encode("utf-8"))
+    for part in parts:
+        h.update(b"\x1f")
+        h.update(str(part).strip().encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def is_full_run():
+    return "--full" in sys.argv or os.getenv("FULL_REFRESH") == "1"
+
+def is_unchanged(row_dict, hash_column, new_hash, output_columns=()):
+    """
+    True when the stored watermark matches and the outputs are still filled
+    (a cleared output cell forces the row to be recomputed)
+    """
+    if str(row_dict.get(hash_column, "")).strip() != new_hash:
+        return False
+    return all(str(row_dict.get(col, "")).strip() for col in output_columns)